@@ -0,0 +1,267 @@
+"""
+Measure shuffle quality and throughput of shufflish permutations.
+
+Runs a battery of statistical tests against :func:`shufflish.permutation`,
+:meth:`shufflish.Permutations.get`, and :func:`shufflish.local_shuffle`
+over a grid of ``num_primes``, domain sizes, and chunk sizes.
+Every test reports a z-score, i.e., how many standard deviations the
+observed statistic is away from what a true random shuffle produces.
+Scores close to 0 are good, and absolute values above 4 are very unlikely
+for a true shuffle.
+
+Example::
+
+    python bench/quality.py --domains 100000 1000000 --chunk-sizes 1024 16384
+
+No external binaries or packages are required.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from itertools import product
+from math import sqrt
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shufflish import Permutations, local_shuffle, permutation
+
+
+# number of bins for chi-squared tests
+NUM_BINS = 64
+
+
+def chi2_to_z(x: float, k: int) -> float:
+    """
+    Convert a chi-squared statistic ``x`` with ``k`` degrees of freedom
+    to an approximately standard normal z-score (Wilson-Hilferty).
+    """
+    v = 2 / (9 * k)
+    return ((x / k) ** (1 / 3) - (1 - v)) / sqrt(v)
+
+
+def chi2(observed: Sequence[int], expected: Sequence[float]) -> float:
+    """
+    Returns the z-score of Pearson's chi-squared test.
+    """
+    x = sum((o - e) ** 2 / e for o, e in zip(observed, expected) if e > 0)
+    return chi2_to_z(x, len(observed) - 1)
+
+
+def serial_correlation(t: Sequence[int]) -> float:
+    """
+    Lag-1 autocorrelation of the sequence.
+    For a random permutation this is roughly normal with mean 0
+    and standard deviation ``1/sqrt(n)``.
+    """
+    n = len(t)
+    mean = (n - 1) / 2
+    var = sum((x - mean) ** 2 for x in t)
+    cov = sum((a - mean) * (b - mean) for a, b in zip(t, t[1:]))
+    return cov / var * sqrt(n)
+
+
+def runs(t: Sequence[int]) -> float:
+    """
+    Runs up and down test: count maximal ascending and descending runs.
+    Random sequences have ``(2n-1)/3`` runs with variance ``(16n-29)/90``.
+    """
+    n = len(t)
+    num_runs = 1
+    up = t[1] > t[0]
+    for a, b in zip(t[1:], t[2:]):
+        if (b > a) != up:
+            num_runs += 1
+            up = not up
+    mean = (2 * n - 1) / 3
+    std = sqrt((16 * n - 29) / 90)
+    return (num_runs - mean) / std
+
+
+def gaps(t: Sequence[int], fraction: float = 0.1) -> float:
+    """
+    Gap test: values below ``fraction * n`` are marked, and the gaps between
+    marked positions should follow a geometric distribution.
+    """
+    n = len(t)
+    threshold = int(fraction * n)
+    observed = [0] * NUM_BINS
+    last = -1
+    for i, x in enumerate(t):
+        if x < threshold:
+            gap = i - last - 1
+            observed[min(gap, NUM_BINS - 1)] += 1
+            last = i
+    total = sum(observed)
+    expected = [total * fraction * (1 - fraction) ** g for g in range(NUM_BINS - 1)]
+    expected.append(total - sum(expected))
+    return chi2(observed, expected)
+
+
+def displacement(t: Sequence[int]) -> float:
+    """
+    Displacement test: ``|t[i] - i| / n`` of a random permutation
+    has density ``2 * (1 - d)`` on ``[0, 1)``.
+    """
+    n = len(t)
+    observed = [0] * NUM_BINS
+    for i, x in enumerate(t):
+        observed[abs(x - i) * NUM_BINS // n] += 1
+    # integral of 2 * (1 - d) over [b/B, (b+1)/B)
+    expected = [n * (2 * (NUM_BINS - b) - 1) / NUM_BINS ** 2 for b in range(NUM_BINS)]
+    return chi2(observed, expected)
+
+
+def deltas(t: Sequence[int]) -> float:
+    """
+    Difference test: ``(t[i+1] - t[i]) mod n`` should be uniform.
+    This is constant for an affine cipher, so it fails without local shuffling.
+    """
+    n = len(t)
+    observed = [0] * NUM_BINS
+    for a, b in zip(t, t[1:]):
+        observed[(b - a) % n * NUM_BINS // n] += 1
+    expected = [(n - 1) / NUM_BINS] * NUM_BINS
+    return chi2(observed, expected)
+
+
+def _count_inversions(t: List[int]) -> int:
+    """
+    Merge sort ``t`` in place and return the number of inversions.
+    """
+    inversions = 0
+    width = 1
+    n = len(t)
+    buf = t[:]
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            i, j, k = lo, mid, lo
+            while i < mid and j < hi:
+                if t[j] < t[i]:
+                    buf[k] = t[j]
+                    inversions += mid - i
+                    j += 1
+                else:
+                    buf[k] = t[i]
+                    i += 1
+                k += 1
+            buf[k:hi] = t[i:mid] if i < mid else t[j:hi]
+        t, buf = buf, t
+        width *= 2
+    return inversions
+
+
+def inversions(t: Sequence[int]) -> float:
+    """
+    Inversion count test: a random permutation has ``n(n-1)/4``
+    inversions with variance ``n(n-1)(2n+5)/72``.
+    """
+    n = len(t)
+    mean = n * (n - 1) / 4
+    std = sqrt(n * (n - 1) * (2 * n + 5) / 72)
+    return (_count_inversions(list(t)) - mean) / std
+
+
+TESTS: Dict[str, Callable[[Sequence[int]], float]] = {
+    "serial": serial_correlation,
+    "runs": runs,
+    "gaps": gaps,
+    "displ": displacement,
+    "deltas": deltas,
+    "inv": inversions,
+}
+
+
+def sources(
+    domains: Iterable[int],
+    num_primes: Iterable[int],
+    chunk_sizes: Iterable[int],
+):
+    """
+    Generate ``(name, domain, num_primes, chunk_size, factory)`` for every
+    configuration in the grid.
+    ``factory(seed)`` returns an iterable of indices and is timed.
+    """
+    for domain, k in product(domains, num_primes):
+        yield "permutation", domain, k, 0, \
+            lambda seed, d=domain, k=k: permutation(d, seed, num_primes=k)
+        perms = Permutations(domain, num_primes=k)
+        yield "Permutations.get", domain, k, 0, perms.get
+        for chunk_size in chunk_sizes:
+            yield "local_shuffle", domain, k, chunk_size, \
+                lambda seed, p=perms, c=chunk_size: local_shuffle(p.get(seed), c, seed)
+
+
+def run(
+    domains: Sequence[int],
+    num_primes: Sequence[int],
+    chunk_sizes: Sequence[int],
+    seeds: Sequence[int],
+    threshold: float,
+    out=sys.stdout,
+):
+    header = f"{'source':<17} {'domain':>10} {'k':>2} {'chunk':>6} {'Mi/s':>7}" \
+        + "".join(f" {name:>7}" for name in TESTS) + "  pass"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    results = []
+    for name, domain, k, chunk_size, factory in sources(domains, num_primes, chunk_sizes):
+        elapsed = 0.0
+        scores = dict.fromkeys(TESTS, 0.0)
+        for seed in seeds:
+            start = time.perf_counter()
+            t = tuple(factory(seed))
+            elapsed += time.perf_counter() - start
+            for test_name, test in TESTS.items():
+                z = test(t)
+                # report the worst score over all seeds
+                if abs(z) > abs(scores[test_name]):
+                    scores[test_name] = z
+        throughput = domain * len(seeds) / elapsed / 1e6
+        passed = all(abs(z) < threshold for z in scores.values())
+        results.append((name, domain, k, chunk_size, throughput, passed))
+        print(
+            f"{name:<17} {domain:>10} {k:>2} {chunk_size or '-':>6} {throughput:>7.2f}"
+            + "".join(f" {z:>7.1f}" for z in scores.values())
+            + f"  {'yes' if passed else 'no'}",
+            file=out,
+            flush=True,
+        )
+    print(file=out)
+    for domain in domains:
+        passing = [r for r in results if r[1] == domain and r[5]]
+        if passing:
+            name, _, k, chunk_size, throughput, _ = max(passing, key=lambda r: r[4])
+            print(
+                f"fastest passing configuration for domain={domain}: {name} "
+                f"num_primes={k} chunk_size={chunk_size or '-'} ({throughput:.2f} Mi/s)",
+                file=out,
+            )
+        else:
+            print(f"no configuration passes for domain={domain}", file=out)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure shuffle quality and throughput of shufflish permutations.",
+    )
+    parser.add_argument("--domains", type=int, nargs="+", default=[10**4, 10**5])
+    parser.add_argument("--num-primes", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[2**8, 2**11, 2**14])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1234, 567891, 2**40 + 17])
+    parser.add_argument(
+        "--threshold", type=float, default=4.0,
+        help="maximum absolute z-score for a configuration to pass",
+    )
+    args = parser.parse_args(argv)
+    run(args.domains, args.num_primes, args.chunk_sizes, args.seeds, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Measure how throughput of shared shufflish objects scales with threads.
+
+All threads share one :class:`shufflish.AffineCipher` and one
+:class:`shufflish.Permutations` instance and run the same workload
+on disjoint parts of the domain.
+Throughput is reported in millions of operations per second,
+together with the speedup over a single thread.
+
+Example::
+
+    python bench/threads.py --threads 1 2 4 8 16 --domain 100000000
+
+On a free-threaded build of CPython (3.13t and later) all workloads
+should scale with the number of cores.
+With the GIL, only workloads that release it, like ``fill`` and ``apply``,
+can run in parallel.
+
+No external binaries or packages are required.
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shufflish import AffineCipher, Permutations
+
+
+# number of values per call for fill and apply
+CHUNK_SIZE = 2**14
+
+
+class Shared:
+    """
+    Objects that are shared by all threads.
+    """
+
+    def __init__(self, p: AffineCipher, perms: Permutations, records: array.array | None):
+        self.p = p
+        self.perms = perms
+        self.records = records
+
+
+def fill(shared: Shared, start: int, n: int) -> int:
+    """
+    Write values in chunks with :meth:`AffineCipher.fill`.
+    """
+    buf = memoryview(array.array("Q", bytes(8 * CHUNK_SIZE)))
+    end = start + n
+    while start < end:
+        start += shared.p.fill(buf[:min(CHUNK_SIZE, end - start)], start)
+    return n
+
+
+def apply(shared: Shared, start: int, n: int) -> int:
+    """
+    Gather chunks of records with :meth:`AffineCipher.apply`.
+    """
+    dst = memoryview(array.array("Q", bytes(8 * CHUNK_SIZE)))
+    p = shared.p
+    end = start + n
+    for offset in range(start, end, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, end - offset)
+        p[offset:offset + size].apply(shared.records, dst[:size])
+    return n
+
+
+def getitem(shared: Shared, start: int, n: int) -> int:
+    """
+    Look up single values with ``p[i]``.
+    """
+    p = shared.p
+    for i in range(start, start + n):
+        p[i]
+    return n
+
+
+def index(shared: Shared, start: int, n: int) -> int:
+    """
+    Look up indices of values with :meth:`AffineCipher.index`,
+    which uses the lazily computed inverse of the shared cipher.
+    """
+    p = shared.p
+    for v in range(start, start + n):
+        p.index(v)
+    return n
+
+
+def get(shared: Shared, start: int, n: int) -> int:
+    """
+    Create permutations with :meth:`Permutations.get`.
+    """
+    perms = shared.perms
+    for seed in range(start, start + n):
+        perms.get(seed)
+    return n
+
+
+WORKLOADS: Dict[str, Callable[[Shared, int, int], int]] = {
+    "fill": fill,
+    "apply": apply,
+    "getitem": getitem,
+    "index": index,
+    "get": get,
+}
+
+
+def measure(workload, shared: Shared, num_threads: int, n: int) -> float:
+    """
+    Run ``workload`` with ``num_threads`` threads that each do
+    ``n // num_threads`` operations.
+    Returns the throughput in millions of operations per second.
+    """
+    per_thread = n // num_threads
+    counts = [0] * num_threads
+    barrier = threading.Barrier(num_threads + 1)
+
+    def target(k):
+        barrier.wait()
+        counts[k] = workload(shared, k * per_thread, per_thread)
+
+    threads = [threading.Thread(target=target, args=(k,)) for k in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return sum(counts) / elapsed / 1e6
+
+
+def run(
+    workloads: Sequence[str],
+    threads: Sequence[int],
+    domain: int,
+    python_ops: int,
+    seed: int,
+    repeat: int,
+    out=sys.stdout,
+):
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}", file=out)
+    perms = Permutations(domain)
+    records = array.array("Q", range(domain)) if "apply" in workloads else None
+    header = f"{'workload':<8} {'threads':>7} {'Mops/s':>9} {'speedup':>8}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    results = []
+    for name in workloads:
+        workload = WORKLOADS[name]
+        # bulk workloads process many more values than per-item workloads
+        n = domain if name in ("fill", "apply") else python_ops
+        base = None
+        for num_threads in threads:
+            # new cipher every time, so the inverse is computed concurrently
+            shared = Shared(perms.get(seed), perms, records)
+            throughput = max(
+                measure(workload, shared, num_threads, n)
+                for _ in range(repeat)
+            )
+            if base is None:
+                base = throughput
+            results.append((name, num_threads, throughput))
+            print(
+                f"{name:<8} {num_threads:>7} {throughput:>9.2f} {throughput / base:>7.2f}x",
+                file=out,
+                flush=True,
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure how throughput of shared shufflish objects scales with threads.",
+    )
+    parser.add_argument("--workloads", nargs="+", choices=tuple(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--domain", type=int, default=2**24,
+        help="size of the permutation and number of values for fill and apply",
+    )
+    parser.add_argument(
+        "--python-ops", type=int, default=2**20,
+        help="number of operations for per-item workloads like getitem",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    args = parser.parse_args(argv)
+    if min(args.threads) < 1:
+        parser.error("--threads must be >= 1")
+    run(args.workloads, args.threads, args.domain, args.python_ops, args.seed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,14 +22,12 @@ PACKAGE_DIR = ROOT_DIR / 'shufflish'
 
 def ext_modules():
     include_dirs = [str(PACKAGE_DIR)]
-    cython_files = [PACKAGE_DIR / '_affine.pyx']
-    for cython_file in cython_files:
+    modules = ['_affine', '_concat']
+    for module in modules:
+        cython_file = PACKAGE_DIR / f'{module}.pyx'
         if cython_file.exists():
             cythonize(str(cython_file))
 
-    # source files must be strings relative to setup.py
-    sources = ['shufflish/_affine.c']
-
     extra_link_args = []
     extra_compile_args = []
     if PLATFORM == 'linux':
@@ -46,13 +44,14 @@ def ext_modules():
         ])
 
     return [Extension(
-        'shufflish._affine',
-        sources,
+        f'shufflish.{module}',
+        # source files must be strings relative to setup.py
+        [f'shufflish/{module}.c'],
         language='C',
         include_dirs=include_dirs,
         extra_link_args=extra_link_args,
         extra_compile_args=extra_compile_args,
-    )]
+    ) for module in modules]
 
 
 def exclude_package_data():
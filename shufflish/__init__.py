@@ -4,8 +4,12 @@ from typing import Generator, Iterable, Sequence, Tuple
 from abc import ABC, abstractmethod
 
 import array
+import copy
+import operator
 import random
+import threading
 import warnings
+from collections import OrderedDict
 from math import isqrt, comb, prod
 from itertools import islice, combinations, chain, product
 try:
@@ -23,7 +27,8 @@ except ImportError:
 from weakref import WeakValueDictionary
 
 from ._version import __version__, __version_tuple__
-from ._affine import AffineCipher
+from ._affine import AffineCipher, CipherBank
+from ._concat import ConcatDomain
 
 
 __all__ = (
@@ -74,6 +79,65 @@ They are the 100 largest primes that can be represented by a 64bit unsigned inte
 """
 
 
+LARGE_PRIMES = (
+    340282366920938463463374607431768211297, 340282366920938463463374607431768211283,
+    340282366920938463463374607431768211223, 340282366920938463463374607431768211219,
+    340282366920938463463374607431768211181, 340282366920938463463374607431768211099,
+    340282366920938463463374607431768210781, 340282366920938463463374607431768210743,
+    340282366920938463463374607431768210659, 340282366920938463463374607431768210263,
+    340282366920938463463374607431768210151, 340282366920938463463374607431768210049,
+    340282366920938463463374607431768210047, 340282366920938463463374607431768210037,
+    340282366920938463463374607431768209977, 340282366920938463463374607431768209969,
+    340282366920938463463374607431768209921, 340282366920938463463374607431768209881,
+    340282366920938463463374607431768209777, 340282366920938463463374607431768209771,
+    340282366920938463463374607431768209657, 340282366920938463463374607431768209599,
+    340282366920938463463374607431768209587, 340282366920938463463374607431768209521,
+    340282366920938463463374607431768209503, 340282366920938463463374607431768209477,
+    340282366920938463463374607431768209411, 340282366920938463463374607431768209333,
+    340282366920938463463374607431768209269, 340282366920938463463374607431768209101,
+    340282366920938463463374607431768208997, 340282366920938463463374607431768208979,
+    340282366920938463463374607431768208969, 340282366920938463463374607431768208739,
+    340282366920938463463374607431768208151, 340282366920938463463374607431768208147,
+    340282366920938463463374607431768208097, 340282366920938463463374607431768208049,
+    340282366920938463463374607431768207997, 340282366920938463463374607431768207991,
+    340282366920938463463374607431768207941, 340282366920938463463374607431768207829,
+    340282366920938463463374607431768207619, 340282366920938463463374607431768207611,
+    340282366920938463463374607431768207571, 340282366920938463463374607431768207467,
+    340282366920938463463374607431768207269, 340282366920938463463374607431768207227,
+    340282366920938463463374607431768207179, 340282366920938463463374607431768207107,
+    340282366920938463463374607431768207037, 340282366920938463463374607431768207019,
+    340282366920938463463374607431768206971, 340282366920938463463374607431768206563,
+    340282366920938463463374607431768206453, 340282366920938463463374607431768206339,
+    340282366920938463463374607431768206323, 340282366920938463463374607431768206297,
+    340282366920938463463374607431768206197, 340282366920938463463374607431768206009,
+    340282366920938463463374607431768205967, 340282366920938463463374607431768205951,
+    340282366920938463463374607431768205949, 340282366920938463463374607431768205703,
+    340282366920938463463374607431768205633, 340282366920938463463374607431768205549,
+    340282366920938463463374607431768205459, 340282366920938463463374607431768205409,
+    340282366920938463463374607431768205349, 340282366920938463463374607431768205319,
+    340282366920938463463374607431768205297, 340282366920938463463374607431768205157,
+    340282366920938463463374607431768205057, 340282366920938463463374607431768205043,
+    340282366920938463463374607431768205027, 340282366920938463463374607431768204967,
+    340282366920938463463374607431768204803, 340282366920938463463374607431768204737,
+    340282366920938463463374607431768204733, 340282366920938463463374607431768204617,
+    340282366920938463463374607431768204581, 340282366920938463463374607431768204547,
+    340282366920938463463374607431768204229, 340282366920938463463374607431768204161,
+    340282366920938463463374607431768204143, 340282366920938463463374607431768204091,
+    340282366920938463463374607431768204047, 340282366920938463463374607431768204041,
+    340282366920938463463374607431768204031, 340282366920938463463374607431768203849,
+    340282366920938463463374607431768203831, 340282366920938463463374607431768203749,
+    340282366920938463463374607431768203473, 340282366920938463463374607431768203351,
+    340282366920938463463374607431768203249, 340282366920938463463374607431768203237,
+    340282366920938463463374607431768203063, 340282366920938463463374607431768202957,
+    340282366920938463463374607431768202727, 340282366920938463463374607431768202537,
+)
+"""
+The default set of primes used by :func:`permutation` and :class:`Permutations`
+for domains of at least 2^63.
+They are the 100 largest primes that can be represented by a 128bit unsigned integer.
+"""
+
+
 def _modular_prime_combinations(domain, primes, k):
     """
     Generate all ``k``-combinations of the given primes that are unique mod ``domain``.
@@ -85,8 +149,8 @@ def _modular_prime_combinations(domain, primes, k):
     primes = list(dict.fromkeys(p % domain for p in primes if domain % p != 0))
     seen = set()
     ones = (1,) * (k-1)
-    for p1, p2, p3 in combinations(chain(ones, primes), k):
-        p = p1 * p2 * p3 % domain
+    for c in combinations(chain(ones, primes), k):
+        p = prod(c) % domain
         if p in seen:
             continue
         yield p
@@ -104,8 +168,8 @@ def _modular_prime_combinations_with_repetition(domain, primes, k):
         return
     ones = (1,) * (k-1)
     primes = list(dict.fromkeys(p % domain for p in primes if domain % p != 0))
-    for p1, p2, p3 in combinations(chain(ones, primes), k):
-        yield p1 * p2 * p3 % domain
+    for c in combinations(chain(ones, primes), k):
+        yield prod(c) % domain
 
 
 _COPRIME_CACHE = WeakValueDictionary()
@@ -115,7 +179,7 @@ class Permutations:
     """
     Create many permutations for the given ``domain``, i.e., a random shuffle
     of ``range(domain)``, with fixed settings.
-    ``domain`` must be greater 0 and less than 2^63.
+    ``domain`` must be greater 0 and less than 2^128.
     The returned :class:`AffineCipher` is iterable, indexable, and sliceable::
 
         from shufflish import Permutations
@@ -149,48 +213,115 @@ class Permutations:
     ):
         if domain <= 0:
             raise ValueError("domain must be > 0")
-        if domain >= 2**63:
-            raise ValueError("domain must be < 2**63")
+        if domain >= 2**128:
+            raise ValueError("domain must be < 2**128")
         self.domain = domain
+        primes = _default_primes(domain, primes)
         # use ID of primes to avoid hashing large sequences,
         # and support unhasheable types like list
         cache_key = domain, id(primes), num_primes, allow_repetition
-        self.coprimes = _COPRIME_CACHE.get(cache_key)
-        if self.coprimes is None:
-            if allow_repetition:
-                gen = _modular_prime_combinations_with_repetition(domain, primes, num_primes)
-            else:
-                gen = _modular_prime_combinations(domain, primes, num_primes)
-            # this step can take a little while; if another thread has added
-            # the same coprimes into the cache since we last checked,
-            # we should drop our array and use the cached object instead
-            coprimes = array.array("Q", gen)
-            self.coprimes = _COPRIME_CACHE.get(cache_key)
-            if self.coprimes is None:
-                _COPRIME_CACHE[cache_key] = coprimes
-                self.coprimes = coprimes
+        self.coprimes = _cached_coprimes(
+            cache_key, domain, primes, num_primes, allow_repetition
+        )
         # remember number of combinations for later
-        if not allow_repetition and primes is PRIMES:
-            NUM_COMBINATIONS[domain] = len(self.coprimes)
+        if not allow_repetition and primes is _default_primes(domain, PRIMES):
+            NUM_COMBINATIONS.setdefault((domain, num_primes), len(self.coprimes))
 
-    def get(self, seed=None) -> AffineCipher:
+    def get(self, seed=None) -> AffineCipher | LargeAffineCipher:
         """
         Get a permutation.
         ``seed`` determines which permutation is returned.
         A random ``seed`` is chosen if none is given.
         """
         if seed is None:
-            seed = random.randrange(2**64)
+            seed = _random_seed(self.domain)
         coprimes = self.coprimes
         prime = coprimes[seed % len(coprimes)]
         return _permutation(self.domain, seed, prime)
 
     __getitem__ = get
 
+    def bank(self, seeds: Iterable[int]) -> CipherBank:
+        """
+        Get many permutations at once as a :class:`CipherBank`.
+        The ``k``-th permutation in the bank is the same as ``get(seeds[k])``.
+        ``seeds`` is ideally a buffer of unsigned 64 bit integers,
+        like ``array.array("Q")``, but any iterable of integers works.
+        Only supported for domains less than 2^63.
+        """
+        if self.domain >= 2**63:
+            raise ValueError("domain must be < 2**63")
+        return CipherBank(self.domain, self.coprimes, seeds)
+
+
+class _Coprimes(list):
+    """
+    List that supports weak references, so it can be stored in
+    ``_COPRIME_CACHE``.
+    Used instead of ``array.array`` for coprimes of domains >= 2^64.
+    """
+    __slots__ = ("__weakref__",)
+
+
+# guards _COPRIME_CACHE and _COPRIME_BUILDERS
+_COPRIME_LOCK = threading.Lock()
+# one lock per cache key while its coprimes are being generated
+_COPRIME_BUILDERS = {}
+
+
+def _cached_coprimes(cache_key, domain, primes, num_primes, allow_repetition):
+    """
+    Get coprimes for ``cache_key`` from ``_COPRIME_CACHE``,
+    or generate and add them if they are not cached yet.
+    Generating coprimes can take a little while, so only one thread
+    does it for each key, while others wait for its result.
+    """
+    with _COPRIME_LOCK:
+        coprimes = _COPRIME_CACHE.get(cache_key)
+        if coprimes is not None:
+            return coprimes
+        builder = _COPRIME_BUILDERS.setdefault(cache_key, threading.Lock())
+    with builder:
+        # another thread may have finished while we waited
+        with _COPRIME_LOCK:
+            coprimes = _COPRIME_CACHE.get(cache_key)
+        if coprimes is not None:
+            return coprimes
+        try:
+            if allow_repetition:
+                gen = _modular_prime_combinations_with_repetition(domain, primes, num_primes)
+            else:
+                gen = _modular_prime_combinations(domain, primes, num_primes)
+            coprimes = array.array("Q", gen) if domain < 2**64 else _Coprimes(gen)
+            with _COPRIME_LOCK:
+                _COPRIME_CACHE[cache_key] = coprimes
+        finally:
+            with _COPRIME_LOCK:
+                if _COPRIME_BUILDERS.get(cache_key) is builder:
+                    del _COPRIME_BUILDERS[cache_key]
+    return coprimes
+
 
+# all values are deterministic, so concurrent writers agree
 NUM_COMBINATIONS={}
 
 
+def _default_primes(domain: int, primes: Sequence[int]) -> Sequence[int]:
+    """
+    Replace the default ``PRIMES`` with ``LARGE_PRIMES`` for domains >= 2^63.
+    """
+    if primes is PRIMES and domain >= 2**63:
+        return LARGE_PRIMES
+    return primes
+
+
+def _random_seed(domain: int) -> int:
+    """
+    Returns a random seed that covers all possible offsets for ``domain``.
+    """
+    return random.randrange(2**64 if domain < 2**63 else 2**128)
+
+
 def _select_prime(
     domain: int,
     seed: int,
@@ -206,14 +337,16 @@ def _select_prime(
         return 1
     gen = _modular_prime_combinations(domain, primes, k)
     num_comb = None
-    if primes is PRIMES and domain in NUM_COMBINATIONS:
-        num_comb = NUM_COMBINATIONS[domain]
+    # only counts for the default primes of each domain are cached
+    cacheable = primes is _default_primes(domain, PRIMES)
+    if cacheable and (domain, k) in NUM_COMBINATIONS:
+        num_comb = NUM_COMBINATIONS[domain, k]
         for _ in islice(gen, (seed % num_comb)):
             pass
         return next(gen)
     ps = list(gen)
-    if primes is PRIMES:
-        NUM_COMBINATIONS[domain] = len(ps)
+    if cacheable:
+        NUM_COMBINATIONS.setdefault((domain, k), len(ps))
     return ps[seed % len(ps)]
 
 
@@ -261,11 +394,11 @@ def permutation(
     num_primes=3,
     allow_repetition=False,
     primes: Sequence[int] = PRIMES,
-) -> AffineCipher:
+) -> AffineCipher | LargeAffineCipher:
     """
     Return a permutation for the given ``domain``, i.e.,
     a random shuffle of ``range(domain)``.
-    ``domain`` must be greater 0 and less than 2^63.
+    ``domain`` must be greater 0 and less than 2^128.
     ``seed`` determines which permutation is returned.
     A random ``seed`` is chosen if none is given.
 
@@ -305,13 +438,19 @@ def permutation(
         If you need a lot of permutations for the same domain and cannot afford
         repetitions, consider the :class:`Permutations` class, which generates
         all coprimes ahead of time.
+
+    .. note::
+        For domains of 2^63 and larger, a :class:`LargeAffineCipher` is returned
+        instead of an :class:`AffineCipher`, and :data:`LARGE_PRIMES` are
+        used instead of the default :data:`PRIMES`.
     """
     if domain <= 0:
         raise ValueError("domain must be > 0")
-    if domain >= 2**63:
-        raise ValueError("domain must be < 2**63")
+    if domain >= 2**128:
+        raise ValueError("domain must be < 2**128")
     if seed is None:
-        seed = random.randrange(2**64)
+        seed = _random_seed(domain)
+    primes = _default_primes(domain, primes)
     if allow_repetition:
         prime = _select_prime_with_repetition(domain, seed, primes, num_primes)
     else:
@@ -319,7 +458,240 @@ def permutation(
     return _permutation(domain, seed, prime)
 
 
-def _permutation(domain: int, seed: int, prime: int) -> AffineCipher:
+def _sign(x: int) -> int:
+    return (x > 0) - (x < 0)
+
+
+def _range_size(start: int, stop: int, step: int) -> int:
+    """
+    Same as ``len(range(start, stop, step))``, but without the size limit.
+    """
+    if step > 0:
+        return max(0, (stop - start + step - 1) // step)
+    return max(0, (start - stop - step - 1) // -step)
+
+
+def _size(sequence) -> int:
+    """
+    Same as ``len(sequence)``, but also works for sizes of 2^63 and larger.
+    """
+    if isinstance(sequence, (LargeAffineCipher, LocalShuffle)):
+        return sequence.size()
+    return len(sequence)
+
+
+def _check_uint64_values(sequence):
+    """
+    Raise :class:`ValueError` if values of ``sequence``
+    may not fit into ``array.array("Q")``.
+    """
+    if isinstance(sequence, LocalShuffle):
+        sequence = sequence.sequence
+    if isinstance(sequence, LargeAffineCipher) and sequence.parameters()[0] > 2**64:
+        raise ValueError("domain must be <= 2**64")
+
+
+class LargeAffineCipher:
+    """
+    LargeAffineCipher(domain: int, prime: int, pre_offset: int, post_offset: int)
+
+    Same as :class:`AffineCipher`, but implemented with Python integers,
+    so there is no upper limit for ``domain``.
+    :func:`permutation` and :class:`Permutations` return instances of this
+    class for domains of 2^63 and larger.
+    It supports the same operations as :class:`AffineCipher`, though
+    everything is considerably slower.
+
+    .. note::
+        :func:`len` cannot return values of 2^63 and larger,
+        so use :meth:`LargeAffineCipher.size` instead.
+    """
+
+    __slots__ = ("_params", "_start", "_stop", "_step", "_iprime")
+
+    def __init__(self, domain: int, prime: int, pre_offset: int, post_offset: int):
+        if domain <= 0:
+            raise ValueError("domain must be > 0")
+        if prime <= 0:
+            raise ValueError("prime must be > 0")
+        if pre_offset < 0:
+            raise ValueError("pre_offset must be >= 0")
+        if post_offset < 0:
+            raise ValueError("post_offset must be >= 0")
+        self._params = domain, prime, pre_offset, post_offset
+        self._start = 0
+        self._stop = domain
+        self._step = 1
+        self._iprime = None
+
+    def _new(self, params, start, stop, step, iprime) -> LargeAffineCipher:
+        ac = LargeAffineCipher.__new__(LargeAffineCipher)
+        ac._params = params
+        ac._start = start
+        ac._stop = stop
+        ac._step = step
+        ac._iprime = iprime
+        return ac
+
+    def _value(self, i: int) -> int:
+        domain, prime, pre_offset, post_offset = self._params
+        return ((i + pre_offset) * prime + post_offset) % domain
+
+    def _inverse_prime(self) -> int:
+        if self._iprime is None:
+            self._iprime = pow(self._params[1], -1, self._params[0])
+        return self._iprime
+
+    def _index(self, value: int) -> int:
+        """
+        Returns ``i`` such that ``_value(i) == value``.
+        """
+        domain, prime, pre_offset, post_offset = self._params
+        return ((value - post_offset) * self._inverse_prime() - pre_offset) % domain
+
+    def size(self) -> int:
+        """
+        Returns the number of values, same as ``len()`` for smaller domains.
+        """
+        return _range_size(self._start, self._stop, self._step)
+
+    def __len__(self):
+        return self.size()
+
+    def __iter__(self):
+        # consecutive values differ by step * prime mod domain,
+        # which is cheaper than multiplication and modulo
+        domain = self._params[0]
+        n = self.size()
+        if n == 0:
+            return
+        v = self._value(self._start)
+        delta = self._step * self._params[1] % domain
+        for _ in range(n):
+            yield v
+            v += delta
+            if v >= domain:
+                v -= domain
+
+    def __getitem__(self, item):
+        n = self.size()
+        if isinstance(item, slice):
+            # same as AffineCipher.__getitem__, see there for details
+            start, stop, step = item.indices(n)
+            n = _range_size(start, stop, step)
+            step *= self._step
+            start = self._start + start * self._step
+            stop = start + (n - 1) * step + _sign(step)
+            return self._new(self._params, start, stop, step, self._iprime)
+        i = operator.index(item)
+        if i < 0:
+            i += n
+        if i < 0 or i >= n:
+            raise IndexError("index out of range")
+        return self._value(self._start + i * self._step)
+
+    def __repr__(self):
+        domain, prime, pre_offset, post_offset = self._params
+        return f"<LargeAffineCipher domain={domain} prime={prime} pre={pre_offset} " \
+            f"post={post_offset} slice=({self._start},{self._stop},{self._step})>"
+
+    def __hash__(self):
+        return hash((*self._params, self._start, self._stop, self._step))
+
+    def __eq__(self, other):
+        if not isinstance(other, LargeAffineCipher):
+            return False
+        return self._params == other._params \
+            and self._start == other._start \
+            and self._stop == other._stop \
+            and self._step == other._step
+
+    def _slice_index(self, value) -> int | None:
+        """
+        Returns the index of ``value`` in this slice, or ``None``.
+        """
+        if not isinstance(value, int) or value < 0 or value >= self._params[0]:
+            return None
+        i = self._index(value)
+        start, step = self._start, self._step
+        if step > 0:
+            if start <= i < self._stop and (i - start) % step == 0:
+                return (i - start) // step
+        elif self._stop < i <= start and (i - start) % step == 0:
+            return (i - start) // step
+        return None
+
+    def __contains__(self, item):
+        return self._slice_index(item) is not None
+
+    def index(self, value: int) -> int:
+        """
+        Return the index of value.
+
+        Raises :class:`ValueError` if the value is not present.
+        """
+        i = self._slice_index(value)
+        if i is None:
+            raise ValueError(f'{value} is not in slice')
+        return i
+
+    def parameters(self) -> Tuple[int, int, int, int]:
+        """
+        Returns the affine parameters as tuple
+        ``(domain, prime, pre_offset, post_offset)``.
+        """
+        return self._params
+
+    def extents(self) -> slice:
+        """
+        Returns the extents (start, stop, step) of this instance as a :class:`slice`.
+        See :meth:`AffineCipher.extents`.
+        """
+        return slice(self._start, self._stop, self._step)
+
+    def is_slice(self) -> bool:
+        """
+        Returns ``True`` if this cipher represents a slice,
+        and ``False`` if it covers the full permutation.
+        """
+        return self._start > 0 or self._stop < self._params[0] or self._step != 1
+
+    def expand(self) -> LargeAffineCipher:
+        """
+        Return a new cipher with the same parameters, but slice extents are
+        set to their initial values ``(0, domain, 1)``.
+        """
+        return self._new(self._params, 0, self._params[0], 1, self._iprime)
+
+    def invert(self) -> LargeAffineCipher:
+        """
+        Returns the inverse of this affine cipher, see :meth:`AffineCipher.invert`.
+        """
+        if self.is_slice():
+            raise RuntimeError(
+                'cannot invert a slice, use expand() to obtain the full permutation'
+            )
+        domain, prime, pre_offset, post_offset = self._params
+        params = domain, self._inverse_prime(), domain - post_offset, domain - pre_offset
+        return self._new(params, 0, domain, 1, prime)
+
+    def fill(self, out, offset: int = 0) -> int:
+        """
+        Write values ``p[offset:offset+len(out)]`` of this cipher into
+        the mutable sequence ``out``, e.g., a :class:`list`,
+        or an ``array.array("Q")`` if ``domain <= 2**64``.
+        Returns the number of values written.
+        See :meth:`AffineCipher.fill`.
+        """
+        if offset < 0:
+            raise ValueError("offset must be >= 0")
+        n = min(max(0, self.size() - offset), len(out))
+        for i, v in enumerate(islice(self[offset:offset + n], n)):
+            out[i] = v
+        return n
+
+
+def _permutation(domain: int, seed: int, prime: int) -> AffineCipher | LargeAffineCipher:
     """
     Here we select a pre-offset, added to the index before multiplication
     with prime, and a post-offset, added after the multiplication.
@@ -333,6 +705,8 @@ def _permutation(domain: int, seed: int, prime: int) -> AffineCipher:
     """
     pre_offset = (seed // prime + isqrt(domain)) % domain
     post_offset = seed % prime
+    if domain >= 2**63:
+        return LargeAffineCipher(domain, prime, pre_offset, post_offset)
     return AffineCipher(domain, prime, pre_offset, post_offset)
 
 
@@ -348,3 +722,475 @@ def local_shuffle(iterable: Iterable, chunk_size: int = 2**14, seed=None) -> Gen
         batch = list(batch)
         rand.shuffle(batch)
         yield from batch
+
+
+_MASK64 = 2**64 - 1
+
+
+def _derive_seed(seed: int, index: int) -> int:
+    """
+    Derive a 64 bit seed from ``seed`` and ``index``.
+    Uses the SplitMix64 finalizer, so consecutive indices produce
+    unrelated seeds.
+    """
+    x = (seed + (index + 1) * 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class EpochStream:
+    """
+    An endless stream of indices from ``range(domain)``,
+    where each epoch is a different permutation::
+
+        from shufflish import EpochStream
+        stream = EpochStream(10, seed=42)
+
+        for i in stream:
+            print(i)  # runs forever
+
+        print(stream.tell())
+        print(list(stream.read(25)))
+
+    The seed for each epoch is derived from ``seed`` and the epoch number,
+    and permutations are created with a :class:`Permutations` instance.
+    Since all permutations are random access, :meth:`seek` can jump to
+    any position in any epoch in constant time.
+
+    Use ``shard`` and ``num_shards`` to split every epoch between workers,
+    where each worker gets a slice ``[shard::num_shards]`` of the
+    permutation.
+    All workers must use the same ``seed``, so it is required
+    if ``num_shards > 1``.
+    With ``drop_last=True`` the last ``domain % num_shards`` indices
+    of every epoch are dropped, so all shards have the same epoch length
+    and stay in lockstep.
+    The remaining parameters are passed on to :class:`Permutations`.
+    """
+
+    def __init__(
+        self,
+        domain: int,
+        seed: int | None = None,
+        shard: int = 0,
+        num_shards: int = 1,
+        drop_last: bool = False,
+        num_primes=3,
+        allow_repetition=False,
+        primes: Sequence[int] = PRIMES,
+    ):
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+        if not 0 <= shard < num_shards:
+            raise ValueError("shard must be >= 0 and < num_shards")
+        self.permutations = Permutations(domain, num_primes, allow_repetition, primes)
+        self.shard = shard
+        self.num_shards = num_shards
+        stop = domain - domain % num_shards if drop_last else domain
+        self._slice = slice(shard, stop, num_shards)
+        self.epoch_length = _range_size(shard, stop, num_shards)
+        if self.epoch_length == 0:
+            raise ValueError("epochs are empty, domain is too small for num_shards")
+        if seed is None:
+            # shards must agree on the seed, or they would overlap
+            if num_shards > 1:
+                raise ValueError("seed is required when num_shards > 1")
+            seed = random.randrange(2**64)
+        self.seed = seed
+        self._epoch = 0
+        self._position = 0
+        self._cipher = None
+        self._cipher_epoch = -1
+
+    def epoch_seed(self, epoch: int) -> int:
+        """
+        Returns the seed used for the given ``epoch``.
+        """
+        return _derive_seed(self.seed, epoch)
+
+    def epoch_permutation(self, epoch: int) -> AffineCipher | LargeAffineCipher:
+        """
+        Returns this shard's part of the permutation for the given ``epoch``.
+        """
+        return self.permutations.get(self.epoch_seed(epoch))[self._slice]
+
+    def _current(self) -> AffineCipher | LargeAffineCipher:
+        if self._cipher_epoch != self._epoch:
+            self._cipher = self.epoch_permutation(self._epoch)
+            self._cipher_epoch = self._epoch
+        return self._cipher
+
+    def tell(self) -> Tuple[int, int]:
+        """
+        Returns the current ``(epoch, position)``.
+        """
+        return self._epoch, self._position
+
+    def seek(self, epoch: int, position: int = 0):
+        """
+        Continue the stream at ``position`` in ``epoch``.
+        """
+        if epoch < 0:
+            raise ValueError("epoch must be >= 0")
+        if not 0 <= position < self.epoch_length:
+            raise ValueError("position must be >= 0 and < epoch_length")
+        self._epoch = epoch
+        self._position = position
+
+    @property
+    def step(self) -> int:
+        """
+        Number of indices this stream produced since the start of epoch 0.
+        """
+        return self._epoch * self.epoch_length + self._position
+
+    def seek_step(self, step: int):
+        """
+        Continue the stream after ``step`` indices have been produced,
+        i.e., such that :attr:`step` equals ``step``.
+        """
+        if step < 0:
+            raise ValueError("step must be >= 0")
+        self._epoch, self._position = divmod(step, self.epoch_length)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        value = self._current()[self._position]
+        self._position += 1
+        if self._position == self.epoch_length:
+            self._epoch += 1
+            self._position = 0
+        return value
+
+    def read(self, n: int) -> array.array:
+        """
+        Returns the next ``n`` indices as ``array.array("Q")``.
+        Epoch boundaries are crossed as necessary.
+        Only supported for domains up to 2^64.
+        """
+        if n < 0:
+            raise ValueError("n must be >= 0")
+        if self.permutations.domain > 2**64:
+            raise ValueError("domain must be <= 2**64")
+        out = array.array("Q", bytes(8 * n))
+        view = memoryview(out)
+        offset = 0
+        while offset < n:
+            count = self._current().fill(view[offset:], self._position)
+            offset += count
+            self._position += count
+            if self._position == self.epoch_length:
+                self._epoch += 1
+                self._position = 0
+        return out
+
+    def chunks(self, chunk_size: int = 2**16) -> Generator[array.array]:
+        """
+        Endlessly yield chunks of ``chunk_size`` indices
+        as ``array.array("Q")``, see :meth:`read`.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        while True:
+            yield self.read(chunk_size)
+
+
+class LocalShuffle:
+    """
+    Like :func:`local_shuffle`, but returns a sequence that can be
+    indexed and sliced instead of a generator::
+
+        from shufflish import LocalShuffle, permutation
+        p = LocalShuffle(permutation(100000), chunk_size=1024, seed=42)
+
+        print(p[3])
+        print(list(p[3:8]))
+        print(len(p))
+
+        # take every 4th value, starting at 1
+        shard = p[1::4]
+
+    ``sequence`` is split into chunks of ``chunk_size`` values.
+    Every chunk is shuffled with a random generator seeded by
+    ``seed`` and the index of the chunk, so any chunk can be
+    materialized independently.
+    Accessing a value costs ``O(chunk_size)`` the first time its chunk
+    is touched.
+    The ``cache_size`` most recently used chunks are kept in memory,
+    so accessing more values from the same chunk is fast.
+    Slices share this cache with the original instance.
+
+    ``sequence`` can be any sequence, but :class:`AffineCipher` is
+    recommended, since chunks are materialized with
+    :meth:`AffineCipher.fill`.
+    Use :meth:`size` instead of ``len()`` for sizes of 2^63 and larger.
+
+    .. note::
+        The order of values is different from :func:`local_shuffle`
+        for the same ``seed``.
+    """
+
+    def __init__(
+        self,
+        sequence: Sequence[int],
+        chunk_size: int = 2**14,
+        seed: int | None = None,
+        cache_size: int = 4,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if cache_size < 1:
+            raise ValueError("cache_size must be >= 1")
+        if seed is None:
+            seed = random.randrange(2**64)
+        self.sequence = sequence
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.cache_size = cache_size
+        self._sequence_size = _size(sequence)
+        self._range = range(self._sequence_size)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _chunk(self, c: int) -> list:
+        """
+        Returns the ``c``-th shuffled chunk.
+        """
+        with self._lock:
+            chunk = self._cache.get(c)
+            if chunk is not None:
+                self._cache.move_to_end(c)
+                return chunk
+        start = c * self.chunk_size
+        stop = min(start + self.chunk_size, self._sequence_size)
+        if isinstance(self.sequence, AffineCipher):
+            buf = array.array("Q", bytes(8 * (stop - start)))
+            self.sequence[start:stop].fill(buf)
+            chunk = buf.tolist()
+        elif isinstance(self.sequence, LargeAffineCipher):
+            chunk = [0] * (stop - start)
+            self.sequence[start:stop].fill(chunk)
+        else:
+            chunk = list(self.sequence[start:stop])
+        random.Random(_derive_seed(self.seed, c)).shuffle(chunk)
+        with self._lock:
+            self._cache[c] = chunk
+            self._cache.move_to_end(c)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return chunk
+
+    def size(self) -> int:
+        """
+        Returns the number of values, same as ``len()``,
+        but also works for sizes of 2^63 and larger.
+        """
+        r = self._range
+        return _range_size(r.start, r.stop, r.step)
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            view = copy.copy(self)
+            view._range = self._range[item]
+            return view
+        try:
+            i = self._range[item]
+        except IndexError:
+            raise IndexError("index out of range") from None
+        c, j = divmod(i, self.chunk_size)
+        return self._chunk(c)[j]
+
+    def __iter__(self):
+        chunk_size = self.chunk_size
+        current = -1
+        chunk = None
+        for i in self._range:
+            c, j = divmod(i, chunk_size)
+            if c != current:
+                chunk = self._chunk(c)
+                current = c
+            yield chunk[j]
+
+    def __repr__(self):
+        r = self._range
+        return (
+            f"<LocalShuffle sequence={self.sequence!r} chunk_size={self.chunk_size} "
+            f"seed={self.seed} slice=({r.start},{r.stop},{r.step})>"
+        )
+
+    def extents(self) -> slice:
+        """
+        Returns the extents (start, stop, step) of this instance as a :class:`slice`,
+        relative to the shuffled ``sequence``.
+        """
+        r = self._range
+        return slice(r.start, r.stop, r.step)
+
+
+class StratifiedPermutation:
+    """
+    A permutation of rows that belong to different classes,
+    where every window of consecutive values contains classes in
+    close to their overall proportions::
+
+        import array
+        from shufflish import StratifiedPermutation
+        labels = [0, 1, 0, 0, 2, 0, 1, 0, 0, 0]
+        classes = [
+            array.array("Q", [i for i, l in enumerate(labels) if l == c])
+            for c in range(3)
+        ]
+        p = StratifiedPermutation(classes, seed=42)
+
+        print(p[3])
+        print(list(p[3:8]))
+        print(len(p))
+
+        # take every 4th value, starting at 1
+        shard = p[1::4]
+
+    ``classes`` contains the rows of each class, ideally as compact
+    sequences like ``array.array("Q")``.
+    Rows of class ``k`` are shuffled by ``permutation(len(classes[k]))``
+    with a seed derived from ``seed`` and ``k``.
+    ``num_primes`` and ``allow_repetition`` are passed on to
+    :func:`permutation`.
+
+    Classes are interleaved by a balanced binary tree, where each node
+    splits its positions between its left and right subtree proportionally
+    to their sizes, like drawing a line on a grid.
+    Within every window, the count of each class deviates from its
+    expected value by less than the depth of the tree,
+    i.e., ``ceil(log2(len(classes)))``.
+    Where exactly the rounding happens is derived from ``seed``.
+    Indexing costs ``O(log(len(classes)))`` and nothing is materialized.
+    """
+
+    def __init__(
+        self,
+        classes: Sequence[Sequence[int]],
+        seed: int | None = None,
+        num_primes: int = 3,
+        allow_repetition: bool = False,
+    ):
+        if len(classes) == 0:
+            raise ValueError("classes must not be empty")
+        if seed is None:
+            seed = random.randrange(2**64)
+        self.classes = classes
+        self.seed = seed
+        self.permutations = [
+            permutation(
+                len(rows),
+                _derive_seed(seed, k),
+                num_primes=num_primes,
+                allow_repetition=allow_repetition,
+            ) if len(rows) > 0 else None
+            for k, rows in enumerate(classes)
+        ]
+        nonempty = [k for k, rows in enumerate(classes) if len(rows) > 0]
+        if not nonempty:
+            raise ValueError("classes must not all be empty")
+        # each node is (left size, size, rounding offset, left child, right child);
+        # children >= 0 are nodes, negative children ~k are class k
+        self._nodes = []
+        self._root, size = self._build(nonempty)
+        self._range = range(size)
+
+    def _build(self, ids: Sequence[int]) -> Tuple[int, int]:
+        """
+        Build the subtree for the given class ``ids``.
+        Returns its root and size.
+        """
+        if len(ids) == 1:
+            return ~ids[0], len(self.classes[ids[0]])
+        mid = len(ids) // 2
+        left, left_size = self._build(ids[:mid])
+        right, right_size = self._build(ids[mid:])
+        size = left_size + right_size
+        node = len(self._nodes)
+        offset = _derive_seed(self.seed, len(self.classes) + node) % size
+        self._nodes.append((left_size, size, offset, left, right))
+        return node, size
+
+    def _locate(self, i: int) -> Tuple[int, int]:
+        """
+        Returns class and position within its permutation for index ``i``.
+        """
+        nodes = self._nodes
+        node = self._root
+        while node >= 0:
+            left_size, size, offset, left, right = nodes[node]
+            # number of positions before i that go to the left subtree;
+            # i goes left if this number increases at i+1
+            before = (i * left_size + offset) // size
+            if ((i + 1) * left_size + offset) // size > before:
+                i = before
+                node = left
+            else:
+                i -= before
+                node = right
+        return ~node, i
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            view = copy.copy(self)
+            view._range = self._range[item]
+            return view
+        try:
+            i = self._range[item]
+        except IndexError:
+            raise IndexError("index out of range") from None
+        k, j = self._locate(i)
+        return self.classes[k][self.permutations[k][j]]
+
+    def __iter__(self):
+        classes = self.classes
+        permutations = self.permutations
+        for i in self._range:
+            k, j = self._locate(i)
+            yield classes[k][permutations[k][j]]
+
+    def __repr__(self):
+        r = self._range
+        return (
+            f"<StratifiedPermutation num_classes={len(self.classes)} seed={self.seed} "
+            f"slice=({r.start},{r.stop},{r.step})>"
+        )
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """
+        Returns ``(class_id, row)`` for the given ``index``,
+        where ``row`` is the same as ``self[index]``.
+        """
+        try:
+            i = self._range[index]
+        except IndexError:
+            raise IndexError("index out of range") from None
+        k, j = self._locate(i)
+        return k, self.classes[k][self.permutations[k][j]]
+
+    def extents(self) -> slice:
+        """
+        Returns the extents (start, stop, step) of this instance as a :class:`slice`.
+        """
+        r = self._range
+        return slice(r.start, r.stop, r.step)
+
+
+def __getattr__(name):
+    # AsyncPrefetcher needs asyncio, which takes a while to import,
+    # so its module is only imported on first use
+    if name == "AsyncPrefetcher":
+        from ._prefetch import AsyncPrefetcher
+        return AsyncPrefetcher
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
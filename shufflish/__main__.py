@@ -0,0 +1,146 @@
+"""
+Write a permutation to stdout or a file::
+
+    python -m shufflish 1000000 --seed 42 --format raw --dtype uint32 -o indices.bin
+
+Values are generated in chunks with :meth:`AffineCipher.fill`,
+so memory usage is constant regardless of the domain.
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import os
+import sys
+from typing import BinaryIO, Sequence
+
+from . import AffineCipher, LargeAffineCipher, permutation
+
+
+DTYPES = {
+    "uint32": ("I", "<u4"),
+    "uint64": ("Q", "<u8"),
+}
+
+
+def npy_header(dtype: str, length: int) -> bytes:
+    """
+    Returns an NPY format version 1.0 header for a
+    1-dimensional array with the given ``dtype`` and ``length``.
+    """
+    header = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': ({length},), }}"
+    # magic, version, header length, and header incl. newline
+    # must be padded to a multiple of 64 bytes
+    size = 6 + 2 + 2 + len(header) + 1
+    header += " " * (-size % 64) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+def write(
+    p: AffineCipher | LargeAffineCipher,
+    out: BinaryIO,
+    fmt: str = "raw",
+    dtype: str = "uint64",
+    chunk_size: int = 2**20,
+):
+    """
+    Write all values of ``p`` to binary file ``out``.
+    ``fmt`` is either ``"raw"`` (little-endian integers), ``"npy"``, or ``"text"``
+    (one decimal value per line).
+    """
+    typecode, descr = DTYPES[dtype]
+    n = p.size() if isinstance(p, LargeAffineCipher) else len(p)
+    if fmt == "npy":
+        out.write(npy_header(descr, n))
+    buf = array.array(typecode, bytes(array.array(typecode).itemsize * chunk_size))
+    offset = 0
+    while offset < n:
+        count = p.fill(buf, offset)
+        offset += count
+        chunk = buf if count == chunk_size else buf[:count]
+        if fmt == "text":
+            out.write(("\n".join(map(str, chunk)) + "\n").encode("ascii"))
+        elif sys.byteorder == "little":
+            out.write(chunk)
+        else:
+            chunk = array.array(typecode, chunk)
+            chunk.byteswap()
+            out.write(chunk)
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m shufflish",
+        description="Write a permutation of range(domain) to stdout or a file.",
+    )
+    parser.add_argument("domain", type=int, help="size of the permutation")
+    parser.add_argument(
+        "-s", "--seed", type=int, default=None,
+        help="seed that determines the permutation; random if not given, "
+        "required with --num-shards",
+    )
+    parser.add_argument("--num-primes", type=int, default=3)
+    parser.add_argument("--allow-repetition", action="store_true")
+    parser.add_argument("--start", type=int, default=None, help="slice start")
+    parser.add_argument("--stop", type=int, default=None, help="slice stop")
+    parser.add_argument("--step", type=int, default=None, help="slice step")
+    parser.add_argument(
+        "--shard", type=int, default=0,
+        help="write only every num_shards-th value, starting at shard",
+    )
+    parser.add_argument("--num-shards", type=int, default=1)
+    parser.add_argument("-f", "--format", choices=("raw", "npy", "text"), default="raw")
+    parser.add_argument("-d", "--dtype", choices=tuple(DTYPES), default="uint64")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="output file; default is stdout",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=2**20,
+        help="number of values generated and written at once",
+    )
+    args = parser.parse_args(argv)
+
+    if args.num_shards < 1:
+        parser.error("--num-shards must be >= 1")
+    if not 0 <= args.shard < args.num_shards:
+        parser.error("--shard must be >= 0 and < --num-shards")
+    if args.num_shards > 1 and args.seed is None:
+        # shards are written by separate processes that must agree on the seed
+        parser.error("--seed is required when --num-shards > 1")
+    if args.step == 0:
+        parser.error("--step must not be zero")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be >= 1")
+    if args.dtype == "uint32" and args.domain > 2**32:
+        parser.error("domain is too large for dtype uint32")
+    if args.domain > 2**64:
+        parser.error("domain is too large for dtype uint64")
+    try:
+        p = permutation(
+            args.domain,
+            args.seed,
+            num_primes=args.num_primes,
+            allow_repetition=args.allow_repetition,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    p = p[args.start:args.stop:args.step][args.shard::args.num_shards]
+
+    if args.output == "-":
+        out = sys.stdout.buffer
+        try:
+            write(p, out, args.format, args.dtype, args.chunk_size)
+            out.flush()
+        except BrokenPipeError:
+            # reader went away, e.g., when piping into head;
+            # redirect stdout so the interpreter does not complain on exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+    else:
+        with open(args.output, "wb") as out:
+            write(p, out, args.format, args.dtype, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
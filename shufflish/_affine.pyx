@@ -14,9 +14,22 @@
 # cython: freethreading_compatible=True
 
 
+import array
+import sys
+from math import isqrt
+
 import cython
+from cpython.buffer cimport (
+    PyObject_CheckBuffer,
+    PyObject_GetBuffer,
+    PyBuffer_Release,
+    PyBUF_SIMPLE,
+    PyBUF_WRITABLE,
+)
 from cpython.slice cimport PySlice_Unpack, PySlice_AdjustIndices
 from libc.stdint cimport *
+from libc.stdlib cimport malloc, calloc, free
+from libc.string cimport memcpy
 from ._affine_cipher cimport *
 
 
@@ -51,6 +64,120 @@ cdef inline Py_ssize_t sign(Py_ssize_t x) noexcept:
     return (x > 0) - (x < 0)
 
 
+ctypedef fused index_t:
+    uint32_t
+    uint64_t
+
+
+# number of indices calculated at once when applying a permutation;
+# large enough to keep many memory accesses in flight,
+# small enough that the indices stay in L1 cache
+cdef enum:
+    APPLY_BLOCK_SIZE = 512
+
+
+cdef inline void copy_record(
+    char * dst,
+    const char * src,
+    Py_ssize_t itemsize,
+) noexcept nogil:
+    # memcpy with constant size compiles to a single load and store
+    # for common sizes, and unlike pointer casts it is safe for
+    # unaligned records
+    if itemsize == 8:
+        memcpy(dst, src, 8)
+    elif itemsize == 4:
+        memcpy(dst, src, 4)
+    elif itemsize == 2:
+        memcpy(dst, src, 2)
+    elif itemsize == 1:
+        dst[0] = src[0]
+    else:
+        memcpy(dst, src, itemsize)
+
+
+cdef void gather(
+    const affineCipherParameters * params,
+    Py_ssize_t start,
+    Py_ssize_t step,
+    Py_ssize_t n,
+    const char * src,
+    char * dst,
+    Py_ssize_t itemsize,
+) noexcept nogil:
+    """
+    Set ``dst[i] = src[p[start + i * step]]`` for ``i`` in ``range(n)``.
+    Indices are calculated in blocks before any records are copied,
+    so the random reads from ``src`` do not wait on the arithmetic.
+    """
+    cdef uint64_t indices[APPLY_BLOCK_SIZE]
+    cdef Py_ssize_t i = 0, j, m
+    while i < n:
+        m = n - i
+        if m > APPLY_BLOCK_SIZE:
+            m = APPLY_BLOCK_SIZE
+        affineCipherFill64(BEST_KERNEL, params, start + i * step, step, indices, m)
+        for j in range(m):
+            copy_record(dst + (i + j) * itemsize, src + indices[j] * itemsize, itemsize)
+        i += m
+
+
+cdef int permute_inplace(
+    const affineCipherParameters * params,
+    Py_ssize_t n,
+    char * buf,
+    Py_ssize_t itemsize,
+) noexcept nogil:
+    """
+    Set ``buf[i] = buf[p[i]]`` for ``i`` in ``range(n)`` in place
+    by following the cycles of the permutation.
+    A bitmap marks visited indices, so this needs ``n / 8`` bytes
+    plus one record of extra memory.
+    Returns -1 if memory allocation fails, else 0.
+    """
+    cdef uint64_t * visited = <uint64_t *> calloc((n + 63) // 64, sizeof(uint64_t))
+    cdef char * tmp = <char *> malloc(itemsize)
+    cdef Py_ssize_t i, j, k
+    if visited == NULL or tmp == NULL:
+        free(visited)
+        free(tmp)
+        return -1
+    for i in range(n):
+        if (visited[i >> 6] >> (i & 63)) & 1:
+            continue
+        # move records along the cycle starting at i,
+        # the first record is kept in tmp until the cycle closes
+        copy_record(tmp, buf + i * itemsize, itemsize)
+        j = i
+        while True:
+            visited[j >> 6] |= (<uint64_t> 1) << (j & 63)
+            k = <Py_ssize_t> affineCipher(params, j)
+            if k == i:
+                break
+            copy_record(buf + j * itemsize, buf + k * itemsize, itemsize)
+            j = k
+        copy_record(buf + j * itemsize, tmp, itemsize)
+    free(visited)
+    free(tmp)
+    return 0
+
+
+# fastest bulk kernel supported by this CPU, see _affine_cipher.h
+cdef int BEST_KERNEL = affineBestKernel()
+
+
+def _kernels():
+    """
+    Returns the names of all bulk kernels supported by this CPU,
+    fastest kernel first.
+    """
+    return [
+        affineKernelName(k).decode()
+        for k in range(<int> AFFINE_NUM_KERNELS - 1, -1, -1)
+        if affineKernelSupported(k)
+    ]
+
+
 cdef class AffineCipher:
     """
     AffineCipher(domain: int, prime: int, pre_offset: int, post_offset: int)
@@ -174,16 +301,16 @@ cdef class AffineCipher:
             ac.start = start
             ac.stop = stop
             ac.step = step
-            ac.iprime = self.iprime
+            ac.iprime = affineAtomicLoad(&self.iprime)
             return ac
         else:
             i = item
-            i *= self.step
+            n = slice_len(self.start, self.stop, self.step)
             if i < 0:
-                i += self.stop - self.start
-            if i < 0 or i >= self.stop - self.start:
+                i += n
+            if i < 0 or i >= n:
                 raise IndexError("index out of range")
-            return affineCipher(&self.params, i + self.start)
+            return affineCipher(&self.params, self.start + i * self.step)
 
     def __repr__(self):
         return f"<AffineCipher domain={self.params.domain} prime={self.params.prime} pre={self.params.pre_offset} post={self.params.post_offset} slice=({self.start},{self.stop},{self.step})>"
@@ -213,22 +340,32 @@ cdef class AffineCipher:
            and self.step == other_.step
         return eq != 0
 
+    cdef uint64_t inverse_prime(self) noexcept:
+        """
+        Returns the multiplicative inverse of prime modulo domain.
+        It is calculated on first use and then stored atomically,
+        so instances can be shared between threads.
+        """
+        cdef uint64_t iprime = affineAtomicLoad(&self.iprime)
+        if iprime == 0:
+            iprime = <uint64_t> mod_inverse(self.params.prime, self.params.domain)
+            affineAtomicStore(&self.iprime, iprime)
+        return iprime
+
     def __len__(self):
         return slice_len(self.start, self.stop, self.step)
 
     def __contains__(self, item):
-        if not isinstance(item, int) or item < 0:
+        if not isinstance(item, int) or item < 0 or item >= self.params.domain:
             return False
         cdef uint64_t v = item
 
         # determine index i for value v
-        if self.iprime == 0:
-            self.iprime = <uint64_t> mod_inverse(self.params.prime, self.params.domain)
         cdef affineCipherParameters params
         fillAffineCipherParameters(
             &params,
             self.params.domain,
-            self.iprime,
+            self.inverse_prime(),
             self.params.domain - self.params.post_offset,
             self.params.domain - self.params.pre_offset,
         )
@@ -250,14 +387,14 @@ cdef class AffineCipher:
 
         Raises :class:`ValueError` if the value is not present.
         """
+        if value >= self.params.domain:
+            raise ValueError(f'{value} is not in slice')
         # determine index i for value
-        if self.iprime == 0:
-            self.iprime = <uint64_t> mod_inverse(self.params.prime, self.params.domain)
         cdef affineCipherParameters params
         fillAffineCipherParameters(
             &params,
             self.params.domain,
-            self.iprime,
+            self.inverse_prime(),
             self.params.domain - self.params.post_offset,
             self.params.domain - self.params.pre_offset,
         )
@@ -273,6 +410,32 @@ cdef class AffineCipher:
                 return (i - self.start) / self.step
         raise ValueError(f'{value} is not in slice')
 
+    def fill(self, index_t[::1] out, Py_ssize_t offset=0):
+        """
+        Write values ``p[offset:offset+len(out)]`` of this cipher into the
+        buffer ``out`` of unsigned 32 or 64 bit integers,
+        e.g., an ``array.array("Q")``.
+        Returns the number of values written, which is less than ``len(out)``
+        if the end of the cipher is reached.
+
+        This is much faster than iterating over the cipher in Python,
+        and the GIL is released while values are calculated.
+        """
+        return fill_values(self, out, offset, BEST_KERNEL)
+
+    def _fill_kernel(self, index_t[::1] out, Py_ssize_t offset, str kernel):
+        """
+        Same as :meth:`AffineCipher.fill`, but use the given bulk ``kernel``.
+        See :func:`_kernels` for supported kernels.
+        """
+        cdef int k
+        for k in range(<int> AFFINE_NUM_KERNELS):
+            if affineKernelName(k).decode() == kernel:
+                if not affineKernelSupported(k):
+                    raise ValueError(f"kernel {kernel} is not supported by this CPU")
+                return fill_values(self, out, offset, k)
+        raise ValueError(f"unknown kernel {kernel}")
+
     def parameters(self):
         """
         Returns the affine parameters as tuple
@@ -318,13 +481,11 @@ cdef class AffineCipher:
             raise RuntimeError(
                 'cannot invert a slice, use expand() to obtain the full permutation'
             )
-        if self.iprime == 0:
-            self.iprime = <uint64_t> mod_inverse(self.params.prime, self.params.domain)
         cdef AffineCipher ac = AffineCipher.__new__(AffineCipher)
         fillAffineCipherParameters(
             &ac.params,
             self.params.domain,
-            self.iprime,
+            self.inverse_prime(),
             self.params.domain - self.params.post_offset,
             self.params.domain - self.params.pre_offset,
         )
@@ -335,6 +496,93 @@ cdef class AffineCipher:
         ac.iprime = self.params.prime
         return ac
 
+    def apply(self, src, dst, itemsize=None):
+        """
+        Apply this permutation to the records in buffer ``src`` and write
+        them to buffer ``dst``, i.e., ``dst[i] = src[p[i]]``.
+        Records are ``itemsize`` bytes long, which defaults to the
+        itemsize of ``src``, e.g., 8 for ``array.array("Q")``.
+        ``src`` must contain exactly ``domain`` records,
+        ``dst`` must be writable and contain exactly ``len(p)`` records.
+        Slices are supported, and ``src`` and ``dst`` must not overlap.
+        """
+        cdef Py_ssize_t size, n = slice_len(self.start, self.stop, self.step)
+        cdef Py_buffer src_buf, dst_buf
+        if itemsize is None:
+            itemsize = memoryview(src).itemsize
+        size = itemsize
+        if size <= 0:
+            raise ValueError("itemsize must be > 0")
+        PyObject_GetBuffer(src, &src_buf, PyBUF_SIMPLE)
+        try:
+            PyObject_GetBuffer(dst, &dst_buf, PyBUF_SIMPLE | PyBUF_WRITABLE)
+            try:
+                # domain is originally a Py_ssize_t in __init__
+                if src_buf.len != <Py_ssize_t> self.params.domain * size:
+                    raise ValueError(
+                        f"src must contain {self.params.domain} records of {size} bytes"
+                    )
+                if dst_buf.len != n * size:
+                    raise ValueError(f"dst must contain {n} records of {size} bytes")
+                with nogil:
+                    gather(
+                        &self.params,
+                        self.start,
+                        self.step,
+                        n,
+                        <const char *> src_buf.buf,
+                        <char *> dst_buf.buf,
+                        size,
+                    )
+            finally:
+                PyBuffer_Release(&dst_buf)
+        finally:
+            PyBuffer_Release(&src_buf)
+
+    def apply_inplace(self, buffer, itemsize=None):
+        """
+        Apply this permutation to the records in ``buffer`` in place,
+        i.e., the result is the same as with :meth:`AffineCipher.apply`,
+        but no second buffer is needed.
+        Records are ``itemsize`` bytes long, which defaults to the
+        itemsize of ``buffer``.
+        ``buffer`` can be any writable object that supports the buffer protocol,
+        like :class:`bytearray`, :class:`array.array`, or :class:`mmap.mmap`,
+        and must contain exactly ``domain`` records.
+
+        The permutation is applied by following its cycles,
+        which requires ``domain / 8`` bytes of extra memory
+        to remember which records have already been moved.
+
+        .. note::
+            Slices cannot be applied in place.
+            Use :meth:`AffineCipher.expand` to obtain the full permutation first.
+        """
+        cdef Py_ssize_t size
+        cdef Py_buffer buf
+        cdef int ret
+        # domain is originally a Py_ssize_t in __init__
+        cdef Py_ssize_t domain = <Py_ssize_t> self.params.domain
+        if self.start > 0 or self.stop < domain or self.step != 1:
+            raise RuntimeError(
+                'cannot apply a slice in place, use expand() to obtain the full permutation'
+            )
+        if itemsize is None:
+            itemsize = memoryview(buffer).itemsize
+        size = itemsize
+        if size <= 0:
+            raise ValueError("itemsize must be > 0")
+        PyObject_GetBuffer(buffer, &buf, PyBUF_SIMPLE | PyBUF_WRITABLE)
+        try:
+            if buf.len != domain * size:
+                raise ValueError(f"buffer must contain {domain} records of {size} bytes")
+            with nogil:
+                ret = permute_inplace(&self.params, domain, <char *> buf.buf, size)
+            if ret != 0:
+                raise MemoryError()
+        finally:
+            PyBuffer_Release(&buf)
+
     def is_slice(self) -> bool:
         """
         Returns ``True`` if this cipher represents a slice,
@@ -357,5 +605,186 @@ cdef class AffineCipher:
         # domain is originally a Py_ssize_t in __init__
         ac.stop = <Py_ssize_t> self.params.domain
         ac.step = 1
-        ac.iprime = self.iprime
+        ac.iprime = affineAtomicLoad(&self.iprime)
         return ac
+
+
+def _as_uint64(values):
+    """
+    Returns ``values`` if it is a contiguous buffer of unsigned 64 bit
+    integers in native byte order, otherwise a copy as ``array.array("Q")``.
+    Sequences with a ``fill`` method, like :class:`AffineCipher`,
+    are copied with it in one pass.
+    """
+    if PyObject_CheckBuffer(values):
+        m = memoryview(values)
+        if m.ndim == 1 and m.itemsize == 8 and m.c_contiguous \
+        and m.format.lstrip("@=" if sys.byteorder == "big" else "@=<") in ("Q", "L"):
+            return values
+    elif hasattr(values, "fill"):
+        out = array.array("Q", bytes(8 * len(values)))
+        values.fill(out)
+        return out
+    return array.array("Q", values)
+
+
+cdef class CipherBank:
+    """
+    CipherBank(domain: int, coprimes: Sequence[int], seeds: Iterable[int])
+
+    Many permutations of the same ``domain`` stored as one array.
+    Usually created with :meth:`Permutations.bank`::
+
+        from shufflish import Permutations
+        perms = Permutations(1000)
+        bank = perms.bank(range(10000))
+
+        print(bank[123][7])
+        print(list(bank.lookup([123, 5, 9999], [7, 7, 7])))
+
+    The ``k``-th permutation is the same as ``Permutations.get(seeds[k])``,
+    where ``coprimes`` is ``Permutations.coprimes``.
+    Seeds must be less than 2^64.
+    Parameters of all permutations are computed in one pass without the GIL
+    and stored in one contiguous array that uses 32 bytes per permutation.
+    :meth:`lookup` gets values from many permutations at once,
+    and indexing returns the :class:`AffineCipher` for one permutation.
+    """
+
+    cdef affineCipherParameters * params
+    cdef Py_ssize_t n
+    cdef readonly uint64_t domain
+
+    def __cinit__(self):
+        self.params = NULL
+        self.n = 0
+
+    def __init__(self, Py_ssize_t domain, coprimes, seeds):
+        if domain <= 0:
+            raise ValueError("domain must be > 0")
+        coprimes = _as_uint64(coprimes)
+        seeds = _as_uint64(seeds)
+        cdef const uint64_t[::1] cop = coprimes
+        cdef const uint64_t[::1] sd = seeds
+        cdef Py_ssize_t num_coprimes = cop.shape[0]
+        cdef Py_ssize_t n = sd.shape[0], k
+        cdef uint64_t d = <uint64_t> domain
+        cdef uint64_t sqrt_domain = isqrt(domain)
+        cdef uint64_t seed, prime
+        if num_coprimes == 0:
+            raise ValueError("coprimes must not be empty")
+        for k in range(num_coprimes):
+            if cop[k] == 0 or (cop[k] >= d and d > 1):
+                raise ValueError("coprimes must be > 0 and < domain")
+        free(self.params)
+        self.params = <affineCipherParameters *> malloc(
+            (n if n > 0 else 1) * sizeof(affineCipherParameters)
+        )
+        if self.params == NULL:
+            raise MemoryError()
+        self.n = n
+        self.domain = d
+        with nogil:
+            for k in range(n):
+                # same as _permutation in __init__.py, see there for details
+                seed = sd[k]
+                prime = cop[seed % num_coprimes]
+                fillAffineCipherParameters(
+                    &self.params[k],
+                    d,
+                    prime,
+                    ((seed // prime) % d + sqrt_domain % d) % d,
+                    seed % prime,
+                )
+
+    def __dealloc__(self):
+        free(self.params)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, Py_ssize_t k) -> AffineCipher:
+        if k < 0:
+            k += self.n
+        if k < 0 or k >= self.n:
+            raise IndexError("index out of range")
+        cdef AffineCipher ac = AffineCipher.__new__(AffineCipher)
+        ac.params = self.params[k]
+        ac.start = 0
+        # domain is originally a Py_ssize_t in __init__
+        ac.stop = <Py_ssize_t> self.domain
+        ac.step = 1
+        ac.iprime = 0
+        return ac
+
+    def __repr__(self):
+        return f"<CipherBank domain={self.domain} size={self.n}>"
+
+    def lookup(self, perm_ids, positions, out=None):
+        """
+        Returns ``bank[perm_ids[i]][positions[i]]`` for all ``i``.
+
+        ``perm_ids`` and ``positions`` are ideally buffers of unsigned
+        64 bit integers, like ``array.array("Q")``, but any iterable of
+        integers works, e.g., an :class:`AffineCipher`.
+        Everything else is converted to ``array.array("Q")`` first.
+        Results are written to ``out`` if given, which must be a writable
+        buffer of unsigned 64 bit integers with the same length.
+        Otherwise a new ``array.array("Q")`` is returned.
+
+        Raises :class:`IndexError` if any ID or position is out of range.
+        """
+        perm_ids = _as_uint64(perm_ids)
+        positions = _as_uint64(positions)
+        cdef const uint64_t[::1] ids = perm_ids
+        cdef const uint64_t[::1] pos = positions
+        cdef Py_ssize_t i, n = ids.shape[0], bad = -1
+        if pos.shape[0] != n:
+            raise ValueError("perm_ids and positions must have the same length")
+        if out is None:
+            out = array.array("Q", bytes(8 * n))
+        cdef uint64_t[::1] values = out
+        if values.shape[0] != n:
+            raise ValueError("out must have the same length as perm_ids")
+        with nogil:
+            for i in range(n):
+                if ids[i] >= <uint64_t> self.n or pos[i] >= self.domain:
+                    bad = i
+                    break
+                values[i] = affineCipher(&self.params[ids[i]], pos[i])
+        if bad >= 0:
+            if ids[bad] >= <uint64_t> self.n:
+                raise IndexError(f"perm_id {ids[bad]} out of range")
+            raise IndexError(f"position {pos[bad]} out of range")
+        return out
+
+
+cdef Py_ssize_t fill_values(
+    AffineCipher ac,
+    index_t[::1] out,
+    Py_ssize_t offset,
+    int kernel,
+) except -1:
+    """
+    Implementation of :meth:`AffineCipher.fill`.
+    """
+    cdef Py_ssize_t n = slice_len(ac.start, ac.stop, ac.step)
+    cdef Py_ssize_t start
+    if index_t is uint32_t and ac.params.domain > 2**32:
+        raise ValueError("values do not fit into 32 bit buffer")
+    if offset < 0:
+        raise ValueError("offset must be >= 0")
+    if offset > n:
+        offset = n
+    n -= offset
+    if n > out.shape[0]:
+        n = out.shape[0]
+    if n == 0:
+        return 0
+    start = ac.start + offset * ac.step
+    with nogil:
+        if index_t is uint32_t:
+            affineCipherFill32(kernel, &ac.params, start, ac.step, &out[0], n)
+        else:
+            affineCipherFill64(kernel, &ac.params, start, ac.step, &out[0], n)
+    return n
@@ -35,6 +35,52 @@ static inline uint64_t mul_mod(uint64_t a, uint64_t b, uint64_t N) {
 
 #endif
 
+// Atomic access to lazily computed values
+// =======================================
+// Values like the inverse prime of a cipher are computed on first use
+// and may be written by one thread while others read them.
+// All writers store the same value, so relaxed ordering is sufficient,
+// but loads and stores must not tear or be reordered by the compiler.
+#if defined(__GNUC__) || defined(__clang__)
+
+static inline uint64_t affineAtomicLoad(const uint64_t * p) {
+    return __atomic_load_n(p, __ATOMIC_RELAXED);
+}
+
+static inline void affineAtomicStore(uint64_t * p, uint64_t value) {
+    __atomic_store_n(p, value, __ATOMIC_RELAXED);
+}
+
+#elif defined(_MSC_VER)
+
+#include <intrin.h>
+
+// compare-exchange works on all targets, including 32 bit x86
+static inline uint64_t affineAtomicLoad(const uint64_t * p) {
+    return (uint64_t)_InterlockedCompareExchange64((volatile __int64 *)p, 0, 0);
+}
+
+static inline void affineAtomicStore(uint64_t * p, uint64_t value) {
+    __int64 expected = (__int64)affineAtomicLoad(p);
+    __int64 actual;
+    while ((actual = _InterlockedCompareExchange64(
+        (volatile __int64 *)p, (__int64)value, expected)) != expected) {
+        expected = actual;
+    }
+}
+
+#else
+
+static inline uint64_t affineAtomicLoad(const uint64_t * p) {
+    return *(const volatile uint64_t *)p;
+}
+
+static inline void affineAtomicStore(uint64_t * p, uint64_t value) {
+    *(volatile uint64_t *)p = value;
+}
+
+#endif
+
 // Note:
 // The following must be true for affineCipherN functions to work correctly!
 // - domain < 2^63
@@ -70,4 +116,200 @@ static inline uint64_t affineCipher(const struct affineCipherParameters * params
     ) % params->domain;
 }
 
+// Bulk kernels
+// ============
+// Consecutive values p[start + i*step] of a cipher differ by the constant
+// delta = step * prime mod domain.
+// Bulk kernels exploit this by computing the first AFFINE_LANES values with
+// the scalar affineCipher function and then using the recurrence
+// out[i] = (out[i - AFFINE_LANES] + AFFINE_LANES * delta) mod domain,
+// which needs only an addition and a conditional subtraction per value
+// instead of a 128 bit multiplication and division.
+// Results are identical to affineCipher.
+//
+// The recurrence has a dependency distance of AFFINE_LANES, so compilers
+// can vectorize it with up to AFFINE_LANES values per instruction.
+// The generic kernel uses the baseline instruction set, e.g., SSE2 on
+// x86-64 or NEON on aarch64.
+// With GCC and Clang on x86-64 there are additional AVX2 and AVX-512
+// variants, which are selected at runtime based on CPU features.
+
+#define AFFINE_LANES 8
+
+enum affineKernel {
+    AFFINE_KERNEL_GENERIC = 0,
+    AFFINE_KERNEL_AVX2 = 1,
+    AFFINE_KERNEL_AVX512 = 2,
+    AFFINE_NUM_KERNELS = 3,
+};
+
+#if (defined(__GNUC__) || defined(__clang__)) && defined(__x86_64__)
+#define AFFINE_X86_DISPATCH
+#endif
+
+// The recurrence loop is kept in a separate function,
+// so compilers see a simple loop they can vectorize.
+#if defined(_MSC_VER)
+#define AFFINE_NOINLINE __declspec(noinline)
+#elif defined(__GNUC__) || defined(__clang__)
+#define AFFINE_NOINLINE __attribute__((noinline))
+#else
+#define AFFINE_NOINLINE
+#endif
+
+// Returns step * prime mod domain for a possibly negative step.
+static inline uint64_t affineCipherDelta(
+    const struct affineCipherParameters * params,
+    int64_t step
+) {
+    uint64_t s;
+    if (step >= 0) {
+        s = (uint64_t)step % params->domain;
+    } else {
+        s = (params->domain - (uint64_t)(-(step + 1)) % params->domain - 1);
+    }
+    return mul_mod(s, params->prime, params->domain);
+}
+
+#define AFFINE_DEFINE_FILL_KERNEL(NAME, ATTRIBUTES, OUT_T)                     \
+ATTRIBUTES AFFINE_NOINLINE static void NAME##Recurrence(                      \
+    uint64_t delta,                                                            \
+    uint64_t domain,                                                           \
+    OUT_T * out,                                                               \
+    size_t n                                                                   \
+) {                                                                            \
+    size_t i;                                                                  \
+    for (i = AFFINE_LANES; i < n; ++i) {                                       \
+        /* values < domain < 2^63, so this does not overflow and */            \
+        /* x >> 63 is all ones if x is negative, else zero       */            \
+        int64_t x = (int64_t)((uint64_t)out[i - AFFINE_LANES] + delta)         \
+                  - (int64_t)domain;                                           \
+        out[i] = (OUT_T)(x + ((x >> 63) & (int64_t)domain));                   \
+    }                                                                          \
+}                                                                              \
+                                                                               \
+ATTRIBUTES static void NAME(                                                  \
+    const struct affineCipherParameters * params,                              \
+    uint64_t start,                                                            \
+    int64_t step,                                                              \
+    OUT_T * out,                                                               \
+    size_t n                                                                   \
+) {                                                                            \
+    uint64_t delta;                                                            \
+    size_t i;                                                                  \
+    if (n < 2 * AFFINE_LANES) {                                                \
+        for (i = 0; i < n; ++i) {                                              \
+            out[i] = (OUT_T)affineCipher(params, start + i * step);            \
+        }                                                                      \
+        return;                                                                \
+    }                                                                          \
+    for (i = 0; i < AFFINE_LANES; ++i) {                                       \
+        out[i] = (OUT_T)affineCipher(params, start + i * step);                \
+    }                                                                          \
+    delta = mul_mod(                                                           \
+        affineCipherDelta(params, step), AFFINE_LANES, params->domain          \
+    );                                                                         \
+    NAME##Recurrence(delta, params->domain, out, n);                           \
+}
+
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill64Generic, , uint64_t)
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill32Generic, , uint32_t)
+#ifdef AFFINE_X86_DISPATCH
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill64AVX2, __attribute__((target("avx2"))), uint64_t)
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill32AVX2, __attribute__((target("avx2"))), uint32_t)
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill64AVX512, __attribute__((target("avx512f,avx512vl"))), uint64_t)
+AFFINE_DEFINE_FILL_KERNEL(affineCipherFill32AVX512, __attribute__((target("avx512f,avx512vl"))), uint32_t)
+#endif
+
+// Returns 1 if kernel can be used on this CPU, else 0.
+static inline int affineKernelSupported(int kernel) {
+    switch (kernel) {
+    case AFFINE_KERNEL_GENERIC:
+        return 1;
+#ifdef AFFINE_X86_DISPATCH
+    case AFFINE_KERNEL_AVX2:
+        return __builtin_cpu_supports("avx2") != 0;
+    case AFFINE_KERNEL_AVX512:
+        return __builtin_cpu_supports("avx512f") != 0
+            && __builtin_cpu_supports("avx512vl") != 0;
+#endif
+    default:
+        return 0;
+    }
+}
+
+static inline const char * affineKernelName(int kernel) {
+    switch (kernel) {
+    case AFFINE_KERNEL_GENERIC:
+        return "generic";
+    case AFFINE_KERNEL_AVX2:
+        return "avx2";
+    case AFFINE_KERNEL_AVX512:
+        return "avx512";
+    default:
+        return "unknown";
+    }
+}
+
+// Returns the fastest kernel supported by this CPU.
+static inline int affineBestKernel(void) {
+    int kernel;
+#ifdef AFFINE_X86_DISPATCH
+    __builtin_cpu_init();
+#endif
+    for (kernel = AFFINE_NUM_KERNELS - 1; kernel > 0; --kernel) {
+        if (affineKernelSupported(kernel)) {
+            return kernel;
+        }
+    }
+    return AFFINE_KERNEL_GENERIC;
+}
+
+// Write values p[start + i*step] for i in [0, n) to out using the given kernel.
+// kernel must be supported, see affineKernelSupported.
+static inline void affineCipherFill64(
+    int kernel,
+    const struct affineCipherParameters * params,
+    uint64_t start,
+    int64_t step,
+    uint64_t * out,
+    size_t n
+) {
+    switch (kernel) {
+#ifdef AFFINE_X86_DISPATCH
+    case AFFINE_KERNEL_AVX2:
+        affineCipherFill64AVX2(params, start, step, out, n);
+        return;
+    case AFFINE_KERNEL_AVX512:
+        affineCipherFill64AVX512(params, start, step, out, n);
+        return;
+#endif
+    default:
+        affineCipherFill64Generic(params, start, step, out, n);
+    }
+}
+
+// Same as affineCipherFill64 for 32 bit output. Requires domain <= 2^32.
+static inline void affineCipherFill32(
+    int kernel,
+    const struct affineCipherParameters * params,
+    uint64_t start,
+    int64_t step,
+    uint32_t * out,
+    size_t n
+) {
+    switch (kernel) {
+#ifdef AFFINE_X86_DISPATCH
+    case AFFINE_KERNEL_AVX2:
+        affineCipherFill32AVX2(params, start, step, out, n);
+        return;
+    case AFFINE_KERNEL_AVX512:
+        affineCipherFill32AVX512(params, start, step, out, n);
+        return;
+#endif
+    default:
+        affineCipherFill32Generic(params, start, step, out, n);
+    }
+}
+
 #endif
@@ -1,6 +1,6 @@
 from libc.stdint cimport *
 
-cdef extern from "_affine_cipher.h":
+cdef extern from "_affine_cipher.h" nogil:
     struct affineCipherParameters:
         uint64_t domain
         uint64_t prime
@@ -16,3 +16,34 @@ cdef extern from "_affine_cipher.h":
         uint64_t pre_offset,
         uint64_t post_offset
     ) noexcept
+
+    cdef uint64_t affineAtomicLoad(const uint64_t * p) noexcept
+    cdef void affineAtomicStore(uint64_t * p, uint64_t value) noexcept
+
+    cdef enum affineKernel:
+        AFFINE_KERNEL_GENERIC
+        AFFINE_KERNEL_AVX2
+        AFFINE_KERNEL_AVX512
+        AFFINE_NUM_KERNELS
+
+    cdef int affineKernelSupported(int kernel) noexcept
+    cdef const char * affineKernelName(int kernel) noexcept
+    cdef int affineBestKernel() noexcept
+
+    cdef void affineCipherFill64(
+        int kernel,
+        const affineCipherParameters * params,
+        uint64_t start,
+        int64_t step,
+        uint64_t * out,
+        size_t n,
+    ) noexcept
+
+    cdef void affineCipherFill32(
+        int kernel,
+        const affineCipherParameters * params,
+        uint64_t start,
+        int64_t step,
+        uint32_t * out,
+        size_t n,
+    ) noexcept
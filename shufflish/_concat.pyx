@@ -0,0 +1,237 @@
+# cython: language_level=3
+# cython: binding=False
+# cython: embedsignature=False
+# cython: boundscheck=False
+# cython: wraparound=False
+# cython: cdivision=True
+# cython: cdivision_warnings=False
+# cython: cpow=True
+# cython: initializedcheck=False
+# cython: nonecheck=False
+# cython: overflowcheck=False
+# cython: emit_code_comments=False
+# cython: linetrace=False
+# cython: freethreading_compatible=True
+
+
+import array
+
+import cython
+from libc.stdint cimport *
+from libc.stdlib cimport malloc, free
+
+from ._affine import _as_uint64
+
+
+cdef Py_ssize_t fill_eytzinger(
+    const uint64_t * sorted_values,
+    uint64_t * values,
+    uint64_t * ranks,
+    Py_ssize_t n,
+    Py_ssize_t pos,
+    Py_ssize_t k,
+) noexcept nogil:
+    """
+    Recursively fill ``values`` with ``sorted_values`` in Eytzinger
+    (breadth-first binary search tree) order, starting at node ``k``.
+    ``ranks`` receives the original position of each value.
+    Returns the next position in ``sorted_values``.
+    """
+    if k <= n:
+        pos = fill_eytzinger(sorted_values, values, ranks, n, pos, 2 * k)
+        values[k] = sorted_values[pos]
+        ranks[k] = pos
+        pos += 1
+        pos = fill_eytzinger(sorted_values, values, ranks, n, pos, 2 * k + 1)
+    return pos
+
+
+cdef inline Py_ssize_t upper_bound(
+    const uint64_t * values,
+    const uint64_t * ranks,
+    Py_ssize_t n,
+    uint64_t x,
+) noexcept nogil:
+    """
+    Return the rank of the first value greater than ``x``,
+    or ``n`` if there is no such value.
+    """
+    cdef Py_ssize_t k = 1
+    while k <= n:
+        k = 2 * k + (values[k] <= x)
+    # going right means values[k] <= x, so the answer is where we last
+    # went left: remove all trailing right turns plus the final left turn
+    while k & 1:
+        k >>= 1
+    k >>= 1
+    if k == 0:
+        return n
+    return <Py_ssize_t> ranks[k]
+
+
+cdef class ConcatDomain:
+    """
+    ConcatDomain(sizes: Iterable[int])
+
+    Maps indices of a domain that is the concatenation of several parts,
+    e.g., a dataset that is split into files with different numbers of rows,
+    to ``(file_id, row)`` pairs::
+
+        from shufflish import ConcatDomain, permutation
+        files = ConcatDomain([3, 0, 5, 2])
+        p = permutation(len(files))
+
+        print(files[7])
+        file_ids, rows = files.locate(p)
+
+    ``len(files)`` is the total number of rows, so it can be used as domain
+    for a permutation.
+    Files may be empty, they are never returned.
+
+    The start offsets of all files are stored in Eytzinger layout,
+    i.e., as an implicit binary search tree in breadth-first order,
+    which keeps the first few levels of every search in cache.
+    A lookup costs ``O(log(num_files))`` and the index uses
+    24 bytes per file.
+    """
+
+    cdef uint64_t * offsets
+    cdef uint64_t * values
+    cdef uint64_t * ranks
+    cdef readonly Py_ssize_t num_files
+    cdef uint64_t total
+
+    def __cinit__(self):
+        self.offsets = NULL
+        self.values = NULL
+        self.ranks = NULL
+
+    def __init__(self, sizes):
+        cdef Py_ssize_t n, i
+        cdef uint64_t total = 0
+        sizes = [int(s) for s in sizes]
+        n = len(sizes)
+        if n == 0:
+            raise ValueError("sizes must not be empty")
+        for s in sizes:
+            if s < 0:
+                raise ValueError("sizes must be >= 0")
+        if sum(sizes) >= 2**63:
+            raise ValueError("total size must be < 2**63")
+        # __init__ may be called again, release the old index first
+        self.release()
+        self.offsets = <uint64_t *> malloc((n + 1) * sizeof(uint64_t))
+        self.values = <uint64_t *> malloc((n + 1) * sizeof(uint64_t))
+        self.ranks = <uint64_t *> malloc((n + 1) * sizeof(uint64_t))
+        if self.offsets == NULL or self.values == NULL or self.ranks == NULL:
+            self.release()
+            raise MemoryError()
+        for i in range(n):
+            self.offsets[i] = total
+            total += <uint64_t> sizes[i]
+        self.offsets[n] = total
+        self.total = total
+        self.num_files = n
+        # node 0 is unused in Eytzinger layout
+        self.values[0] = 0
+        self.ranks[0] = 0
+        fill_eytzinger(self.offsets, self.values, self.ranks, n, 0, 1)
+
+    cdef void release(self) noexcept:
+        """
+        Free the index and reset to an empty domain.
+        """
+        free(self.offsets)
+        free(self.values)
+        free(self.ranks)
+        self.offsets = NULL
+        self.values = NULL
+        self.ranks = NULL
+        self.num_files = 0
+        self.total = 0
+
+    def __dealloc__(self):
+        self.release()
+
+    cdef inline Py_ssize_t find(self, uint64_t i) noexcept nogil:
+        # offsets[0] = 0 <= i, so the upper bound is at least 1
+        return upper_bound(self.values, self.ranks, self.num_files, i) - 1
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, Py_ssize_t i):
+        cdef Py_ssize_t f
+        if i < 0:
+            i += <Py_ssize_t> self.total
+        if i < 0 or <uint64_t> i >= self.total:
+            raise IndexError("index out of range")
+        f = self.find(i)
+        return f, i - <Py_ssize_t> self.offsets[f]
+
+    def __repr__(self):
+        return f"<ConcatDomain num_files={self.num_files} size={self.total}>"
+
+    def offset(self, Py_ssize_t file_id) -> int:
+        """
+        Returns the index of the first row of the given file.
+        """
+        if file_id < 0:
+            file_id += self.num_files
+        if file_id < 0 or file_id >= self.num_files:
+            raise IndexError("file_id out of range")
+        return self.offsets[file_id]
+
+    def size(self, Py_ssize_t file_id) -> int:
+        """
+        Returns the number of rows in the given file.
+        """
+        if file_id < 0:
+            file_id += self.num_files
+        if file_id < 0 or file_id >= self.num_files:
+            raise IndexError("file_id out of range")
+        return self.offsets[file_id + 1] - self.offsets[file_id]
+
+    def locate(self, indices, file_ids=None, rows=None):
+        """
+        Map many indices to files and rows at once.
+        Returns a tuple ``(file_ids, rows)``.
+
+        ``indices`` is ideally a buffer of unsigned 64 bit integers,
+        like ``array.array("Q")``, but any iterable of integers works.
+        Everything else is converted to ``array.array("Q")`` first,
+        an :class:`AffineCipher` efficiently with :meth:`AffineCipher.fill`.
+        Results are written to ``file_ids`` and ``rows`` if given,
+        which must be writable buffers of unsigned 64 bit integers with
+        the same length as ``indices``.
+        Otherwise new ``array.array("Q")`` objects are returned.
+
+        Raises :class:`IndexError` if any index is out of range.
+        """
+        indices = _as_uint64(indices)
+        cdef const uint64_t[::1] idx = indices
+        cdef Py_ssize_t n = idx.shape[0]
+        if file_ids is None:
+            file_ids = array.array("Q", bytes(8 * n))
+        if rows is None:
+            rows = array.array("Q", bytes(8 * n))
+        cdef uint64_t[::1] out_files = file_ids
+        cdef uint64_t[::1] out_rows = rows
+        if out_files.shape[0] != n:
+            raise ValueError("file_ids must have the same length as indices")
+        if out_rows.shape[0] != n:
+            raise ValueError("rows must have the same length as indices")
+        cdef Py_ssize_t i, f, bad = -1
+        cdef uint64_t x
+        with nogil:
+            for i in range(n):
+                x = idx[i]
+                if x >= self.total:
+                    bad = i
+                    break
+                f = self.find(x)
+                out_files[i] = f
+                out_rows[i] = x - self.offsets[f]
+        if bad >= 0:
+            raise IndexError(f"index {idx[bad]} out of range")
+        return file_ids, rows
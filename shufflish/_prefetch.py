@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import array
+import asyncio
+import concurrent.futures
+import threading
+from typing import Generator, Sequence
+
+from . import AffineCipher, LargeAffineCipher, LocalShuffle, _check_uint64_values, _size
+
+
+# put into the queue by the producer after the last chunk
+_PREFETCH_DONE = object()
+
+
+class AsyncPrefetcher:
+    """
+    Asynchronous iterator that yields chunks of ``sequence`` as
+    ``array.array("Q")`` of up to ``chunk_size`` values,
+    e.g., for loaders that fetch samples with :mod:`asyncio`::
+
+        from shufflish import AsyncPrefetcher, permutation
+
+        async def load(domain):
+            async with AsyncPrefetcher(permutation(domain), readahead=8) as chunks:
+                async for chunk in chunks:
+                    for i in chunk:
+                        ...
+
+    Chunks are produced by a background thread, which stays at most
+    ``readahead`` chunks ahead of the consumer.
+    If ``sequence`` is an :class:`AffineCipher`, chunks are produced with
+    :meth:`AffineCipher.fill`, which releases the GIL.
+    Iteration starts at position ``start`` in ``sequence``.
+
+    If ``shuffle_chunk_size`` is given, ``sequence`` is wrapped in a
+    :class:`LocalShuffle` with this chunk size and ``seed``.
+
+    Use ``async with`` or call :meth:`aclose` to stop the background
+    thread if you do not consume all chunks.
+    """
+
+    def __init__(
+        self,
+        sequence: Sequence[int],
+        chunk_size: int = 2**16,
+        readahead: int = 4,
+        start: int = 0,
+        shuffle_chunk_size: int | None = None,
+        seed: int | None = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if readahead < 1:
+            raise ValueError("readahead must be >= 1")
+        if start < 0:
+            raise ValueError("start must be >= 0")
+        _check_uint64_values(sequence)
+        if shuffle_chunk_size is not None:
+            sequence = LocalShuffle(sequence, shuffle_chunk_size, seed)
+        self.sequence = sequence
+        self.chunk_size = chunk_size
+        self.readahead = readahead
+        self.start = start
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _chunks(self) -> Generator[array.array]:
+        sequence = self.sequence
+        n = _size(sequence)
+        offset = self.start
+        while offset < n and not self._stop.is_set():
+            size = min(self.chunk_size, n - offset)
+            if isinstance(sequence, (AffineCipher, LargeAffineCipher)):
+                chunk = array.array("Q", bytes(8 * size))
+                sequence.fill(chunk, offset)
+            else:
+                chunk = array.array("Q", sequence[offset:offset + size])
+            offset += size
+            yield chunk
+
+    def _put(self, item, loop) -> bool:
+        """
+        Put ``item`` into the queue, blocking while it is full.
+        Returns ``False`` if the consumer stopped or the event loop is closed.
+        """
+        coro = self._queue.put(item)
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+        except RuntimeError:
+            # event loop is closed
+            coro.close()
+            return False
+        while True:
+            try:
+                future.result(0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                # queue is full, check whether the consumer is gone
+                if self._stop.is_set():
+                    future.cancel()
+                    return False
+            except concurrent.futures.CancelledError:
+                return False
+
+    def _produce(self, loop):
+        try:
+            for chunk in self._chunks():
+                if not self._put(chunk, loop):
+                    return
+        except BaseException as e:
+            # forward errors to the consumer
+            self._put(e, loop)
+        else:
+            self._put(_PREFETCH_DONE, loop)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> array.array:
+        if self._thread is None:
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(self.readahead)
+            self._thread = threading.Thread(target=self._produce, args=(loop,), daemon=True)
+            self._thread.start()
+        if self._stop.is_set():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _PREFETCH_DONE:
+            self._stop.set()
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            self._stop.set()
+            raise item
+        return item
+
+    async def aclose(self):
+        """
+        Stop the background thread and wait for it to finish.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is None:
+            return
+        # make room in the queue, so a blocked producer notices the stop
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
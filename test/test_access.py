@@ -75,6 +75,21 @@ def test_slice_item():
         assert tt == tuple(pp)
 
 
+def test_slice_index_item():
+    domain = 9
+    p = permutation(domain)
+    t = tuple(p)
+    for start, stop, step in extents(domain):
+        tt = t[start:stop:step]
+        pp = p[start:stop:step]
+        for i in range(-len(tt), len(tt)):
+            assert tt[i] == pp[i], (start, stop, step, i)
+        with pytest.raises(IndexError, match='index out of range'):
+            pp[len(tt)]
+        with pytest.raises(IndexError, match='index out of range'):
+            pp[-len(tt)-1]
+
+
 def test_slice_len():
     domain = 13
     p = permutation(domain)
@@ -101,6 +116,8 @@ def test_contains():
     p = permutation(domain)
     for v in range(domain):
         assert v in p
+    for v in (-1, domain, domain + 3, 2**64 - 1):
+        assert v not in p
 
 
 def test_contains_slice():
@@ -138,3 +155,11 @@ def test_index_negative():
     p = permutation(domain)
     with pytest.raises(OverflowError, match="can't convert negative value"):
         p.index(-1)
+
+
+def test_index_out_of_domain():
+    domain = 18
+    p = permutation(domain)
+    for v in (domain, domain + 1, 2**64 - 1):
+        with pytest.raises(ValueError, match="is not in slice"):
+            p.index(v)
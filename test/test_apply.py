@@ -0,0 +1,102 @@
+import array
+import mmap
+
+import pytest
+
+from shufflish import permutation
+
+
+def test_apply():
+    domain = 1234
+    p = permutation(domain)
+    src = array.array("Q", range(domain))
+    dst = array.array("Q", bytes(8 * domain))
+    p.apply(src, dst)
+    assert tuple(dst) == tuple(p)
+
+
+def test_apply_slice():
+    domain = 1235
+    p = permutation(domain)
+    src = array.array("Q", range(domain))
+    for sl in (slice(5, 300), slice(None, None, -3), slice(1000, 3, -7)):
+        pp = p[sl]
+        dst = array.array("Q", bytes(8 * len(pp)))
+        pp.apply(src, dst)
+        assert tuple(dst) == tuple(pp), sl
+
+
+def test_apply_itemsize():
+    domain = 123
+    itemsize = 3
+    p = permutation(domain)
+    src = bytes(b % 256 for b in range(domain * itemsize))
+    dst = bytearray(len(src))
+    p.apply(src, dst, itemsize)
+    for i, x in enumerate(p):
+        assert dst[i*itemsize:(i+1)*itemsize] == src[x*itemsize:(x+1)*itemsize]
+
+
+def test_apply_unaligned():
+    domain = 321
+    p = permutation(domain)
+    for itemsize in (2, 4, 8):
+        src = bytearray(b % 253 for b in range(domain * itemsize + 1))
+        dst = bytearray(len(src))
+        p.apply(memoryview(src)[1:], memoryview(dst)[1:], itemsize)
+        for i, x in enumerate(p):
+            assert dst[1+i*itemsize:1+(i+1)*itemsize] == src[1+x*itemsize:1+(x+1)*itemsize]
+        buf = bytearray(src)
+        p.apply_inplace(memoryview(buf)[1:], itemsize)
+        assert buf[1:] == dst[1:], itemsize
+
+
+def test_apply_wrong_size():
+    p = permutation(10)
+    with pytest.raises(ValueError, match='src must contain 10 records'):
+        p.apply(bytes(9), bytearray(10))
+    with pytest.raises(ValueError, match='dst must contain 10 records'):
+        p.apply(bytes(10), bytearray(11))
+
+
+def test_apply_inplace():
+    for domain in (1, 2, 3, 10, 64, 65, 1236):
+        p = permutation(domain)
+        buf = array.array("Q", range(domain))
+        p.apply_inplace(buf)
+        assert tuple(buf) == tuple(p), domain
+
+
+def test_apply_inplace_itemsize():
+    domain = 1237
+    p = permutation(domain)
+    for itemsize in (1, 2, 4, 5, 8, 24):
+        src = bytes(b % 251 for b in range(domain * itemsize))
+        expected = bytearray(len(src))
+        p.apply(src, expected, itemsize)
+        buf = bytearray(src)
+        p.apply_inplace(buf, itemsize)
+        assert buf == expected, itemsize
+
+
+def test_apply_inplace_mmap():
+    domain = 1238
+    p = permutation(domain)
+    src = array.array("I", range(domain))
+    with mmap.mmap(-1, len(src) * src.itemsize) as buf:
+        buf[:] = src.tobytes()
+        p.apply_inplace(buf, src.itemsize)
+        result = array.array("I", buf[:])
+    assert tuple(result) == tuple(p)
+
+
+def test_apply_inplace_slice():
+    p = permutation(10)
+    with pytest.raises(RuntimeError, match='cannot apply a slice in place'):
+        p[2:].apply_inplace(bytearray(10))
+
+
+def test_apply_inplace_readonly():
+    p = permutation(10)
+    with pytest.raises(BufferError):
+        p.apply_inplace(bytes(10))
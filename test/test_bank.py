@@ -0,0 +1,83 @@
+import array
+import random
+
+import pytest
+
+from shufflish import CipherBank, Permutations
+
+
+def test_bank_matches_get():
+    for domain in (1, 2, 3, 10, 1000, 2**63 - 1):
+        perms = Permutations(domain)
+        seeds = [0, 1, 2, 12345, 2**63, 2**64 - 1]
+        seeds.extend(random.Random(domain).randrange(2**64) for _ in range(100))
+        bank = perms.bank(seeds)
+        assert len(bank) == len(seeds)
+        assert bank.domain == domain
+        for k, seed in enumerate(seeds):
+            assert bank[k] == perms.get(seed), (domain, seed)
+
+
+def test_lookup():
+    domain = 1001
+    perms = Permutations(domain)
+    rand = random.Random(42)
+    bank = perms.bank(array.array("Q", range(100)))
+    ids = [rand.randrange(100) for _ in range(1000)]
+    positions = [rand.randrange(domain) for _ in range(1000)]
+    values = bank.lookup(ids, positions)
+    assert list(values) == [perms.get(k)[i] for k, i in zip(ids, positions)]
+    out = array.array("Q", bytes(8 * 1000))
+    assert bank.lookup(array.array("Q", ids), array.array("Q", positions), out) is out
+    assert out == values
+
+
+def test_bank_conversions():
+    domain = 1001
+    perms = Permutations(domain)
+    seeds = list(range(0, 10000, 7))
+    expected = [perms.get(seed) for seed in seeds]
+    for typecode in ("q", "I", "L", "H"):
+        bank = perms.bank(array.array(typecode, seeds))
+        assert [bank[k] for k in range(len(seeds))] == expected, typecode
+    bank = CipherBank(domain, array.array("I", perms.coprimes), array.array("q", seeds))
+    assert [bank[k] for k in range(len(seeds))] == expected
+
+
+def test_lookup_conversions():
+    domain = 1001
+    perms = Permutations(domain)
+    bank = perms.bank(range(10))
+    ids = [k % 10 for k in range(domain)]
+    p = perms.get(3)
+    expected = bank.lookup(array.array("Q", ids), array.array("Q", p))
+    assert list(expected) == [perms.get(k)[i] for k, i in zip(ids, p)]
+    for typecode in ("I", "q", "H"):
+        assert bank.lookup(array.array(typecode, ids), array.array(typecode, p)) == expected
+    assert bank.lookup(ids, p) == expected
+
+
+def test_lookup_out_of_range():
+    bank = Permutations(10).bank(range(5))
+    with pytest.raises(IndexError, match='perm_id 5 out of range'):
+        bank.lookup([0, 5], [0, 0])
+    with pytest.raises(IndexError, match='position 10 out of range'):
+        bank.lookup([0, 4], [0, 10])
+    with pytest.raises(ValueError, match='same length'):
+        bank.lookup([0, 4], [0])
+
+
+def test_item_out_of_range():
+    bank = Permutations(10).bank(range(5))
+    assert bank[-1] == bank[4]
+    with pytest.raises(IndexError, match='index out of range'):
+        bank[5]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match='domain must be > 0'):
+        CipherBank(0, [1], [0])
+    with pytest.raises(ValueError, match='coprimes must not be empty'):
+        CipherBank(10, [], [0])
+    with pytest.raises(ValueError, match='coprimes must be > 0 and < domain'):
+        CipherBank(10, [3, 10], [0])
@@ -0,0 +1,72 @@
+import array
+import ast
+
+import pytest
+
+from shufflish import permutation
+from shufflish.__main__ import main
+
+
+def test_raw(tmp_path):
+    path = tmp_path / "out.bin"
+    main(["1000", "--seed", "42", "-o", str(path), "--chunk-size", "77"])
+    values = array.array("Q", path.read_bytes())
+    assert tuple(values) == tuple(permutation(1000, 42))
+
+
+def test_raw_uint32(tmp_path):
+    path = tmp_path / "out.bin"
+    main(["1000", "--seed", "42", "-o", str(path), "--dtype", "uint32"])
+    values = array.array("I", path.read_bytes())
+    assert tuple(values) == tuple(permutation(1000, 42))
+
+
+def test_slice_shard(tmp_path):
+    path = tmp_path / "out.bin"
+    p = permutation(1000, 43)
+    main([
+        "1000", "--seed", "43", "-o", str(path),
+        "--start", "10", "--stop", "-10", "--step", "-3",
+        "--shard", "2", "--num-shards", "5",
+    ])
+    values = array.array("Q", path.read_bytes())
+    assert tuple(values) == tuple(p)[10:-10:-3][2::5]
+
+
+def test_text(tmp_path):
+    path = tmp_path / "out.txt"
+    main(["100", "--seed", "44", "-o", str(path), "--format", "text", "--chunk-size", "7"])
+    values = tuple(map(int, path.read_text().split()))
+    assert values == tuple(permutation(100, 44))
+
+
+def test_npy(tmp_path):
+    path = tmp_path / "out.npy"
+    main(["100", "--seed", "45", "-o", str(path), "--format", "npy"])
+    data = path.read_bytes()
+    assert data[:8] == b"\x93NUMPY\x01\x00"
+    header_len = int.from_bytes(data[8:10], "little")
+    assert (10 + header_len) % 64 == 0
+    header = ast.literal_eval(data[10:10 + header_len].decode("latin1"))
+    assert header == {"descr": "<u8", "fortran_order": False, "shape": (100,)}
+    values = array.array("Q", data[10 + header_len:])
+    assert tuple(values) == tuple(permutation(100, 45))
+
+
+def test_stdout(capsysbinary):
+    main(["10", "--seed", "46", "--format", "text"])
+    values = tuple(map(int, capsysbinary.readouterr().out.split()))
+    assert values == tuple(permutation(10, 46))
+
+
+def test_invalid_arguments():
+    with pytest.raises(SystemExit):
+        main(["0"])
+    with pytest.raises(SystemExit):
+        main(["10", "--shard", "1"])
+    with pytest.raises(SystemExit):
+        main([str(2**32 + 1), "--dtype", "uint32"])
+    with pytest.raises(SystemExit):
+        main(["10", "--step", "0"])
+    with pytest.raises(SystemExit):
+        main(["10", "--shard", "1", "--num-shards", "2"])
@@ -55,3 +55,13 @@ def test_invert_complete():
     ip = p.invert()
     for x in range(domain):
         assert ip[p[x]] == x
+
+
+def test_num_primes():
+    domain = 101
+    for num_primes in (1, 2, 4):
+        for seed in range(5):
+            is_complete(permutation(domain, seed, num_primes=num_primes), domain)
+            is_complete(permutation(domain, seed, num_primes=num_primes, allow_repetition=True), domain)
+        perms = Permutations(domain, num_primes=num_primes)
+        is_complete(perms.get(0), domain)
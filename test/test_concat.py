@@ -0,0 +1,101 @@
+import array
+from bisect import bisect_right
+from itertools import accumulate
+import random
+
+import pytest
+
+from shufflish import ConcatDomain, permutation
+
+
+def reference(sizes, i):
+    offsets = [0, *accumulate(sizes)]
+    f = bisect_right(offsets, i) - 1
+    # skip empty files
+    while offsets[f + 1] == offsets[f]:
+        f += 1
+    return f, i - offsets[f]
+
+
+def test_item():
+    rand = random.Random(42)
+    for num_files in (1, 2, 3, 7, 8, 9, 100):
+        sizes = [rand.choice((0, 1, 2, 5, 17)) for _ in range(num_files)]
+        sizes[rand.randrange(num_files)] += 1
+        cd = ConcatDomain(sizes)
+        assert len(cd) == sum(sizes)
+        for i in range(len(cd)):
+            assert cd[i] == reference(sizes, i), (sizes, i)
+
+
+def test_item_out_of_bounds():
+    cd = ConcatDomain([3, 4])
+    assert cd[-1] == (1, 3)
+    with pytest.raises(IndexError, match='index out of range'):
+        cd[7]
+    with pytest.raises(IndexError, match='index out of range'):
+        cd[-8]
+
+
+def test_locate():
+    sizes = [10, 0, 0, 3, 25, 1, 0, 7]
+    cd = ConcatDomain(sizes)
+    p = permutation(len(cd))
+    file_ids, rows = cd.locate(array.array("Q", p))
+    assert list(zip(file_ids, rows)) == [reference(sizes, i) for i in p]
+    assert cd.locate(p) == (file_ids, rows)
+
+
+def test_locate_conversions():
+    sizes = [10, 0, 3, 25, 1, 7]
+    cd = ConcatDomain(sizes)
+    p = permutation(len(cd))
+    expected = cd.locate(array.array("Q", p))
+    for typecode in ("I", "q", "L", "H"):
+        assert cd.locate(array.array(typecode, p)) == expected, typecode
+    assert cd.locate(p[::-1]) == cd.locate(array.array("Q", p[::-1]))
+    assert cd.locate(memoryview(array.array("Q", [x for x in p for _ in (0, 1)]))[::2]) == expected
+    assert cd.locate(list(p)) == expected
+
+
+def test_locate_out():
+    cd = ConcatDomain([5, 6])
+    indices = array.array("Q", range(11))
+    file_ids = array.array("Q", bytes(88))
+    rows = array.array("Q", bytes(88))
+    assert cd.locate(indices, file_ids, rows) == (file_ids, rows)
+    assert list(file_ids) == [0] * 5 + [1] * 6
+    assert list(rows) == [*range(5), *range(6)]
+
+
+def test_locate_out_of_bounds():
+    cd = ConcatDomain([5, 6])
+    with pytest.raises(IndexError, match='index 11 out of range'):
+        cd.locate([0, 11])
+
+
+def test_offset_size():
+    cd = ConcatDomain([5, 0, 6])
+    assert [cd.offset(f) for f in range(3)] == [0, 5, 5]
+    assert [cd.size(f) for f in range(3)] == [5, 0, 6]
+    assert cd.num_files == 3
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError, match='sizes must not be empty'):
+        ConcatDomain([])
+    with pytest.raises(ValueError, match='sizes must be >= 0'):
+        ConcatDomain([1, -1])
+    with pytest.raises(ValueError, match=r'total size must be < 2\*\*63'):
+        ConcatDomain([2**62, 2**62])
+
+
+def test_reinit():
+    cd = ConcatDomain([5, 6])
+    cd.__init__([1, 2, 3])
+    assert len(cd) == 6
+    assert cd.num_files == 3
+    assert [cd[i] for i in range(6)] == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (2, 2)]
+    with pytest.raises(ValueError):
+        cd.__init__([])
+    assert len(cd) == 6
@@ -34,13 +34,13 @@ def test_zero_domain_class():
 
 
 def test_too_large_domain_function():
-    with pytest.raises(ValueError, match=r'domain must be < 2\*\*63'):
-        permutation(2**63)
+    with pytest.raises(ValueError, match=r'domain must be < 2\*\*128'):
+        permutation(2**128)
 
 
 def test_too_large_domain_class():
-    with pytest.raises(ValueError, match=r'domain must be < 2\*\*63'):
-        Permutations(2**63)
+    with pytest.raises(ValueError, match=r'domain must be < 2\*\*128'):
+        Permutations(2**128)
 
 
 def test_zero_prime():
@@ -183,3 +183,11 @@ def test_is_slice():
     assert not p[::1].is_slice()
     assert p[::-1].is_slice()
     assert p[::-2].is_slice()
+
+
+def test_function_class_num_primes():
+    domain = 130
+    for num_primes in (1, 2, 3):
+        perms = Permutations(domain, num_primes=num_primes)
+        for seed in (1234, 567891):
+            assert perms.get(seed) == permutation(domain, seed, num_primes=num_primes)
@@ -0,0 +1,100 @@
+from itertools import islice
+
+import pytest
+
+from shufflish import EpochStream, Permutations
+
+
+def test_epochs_are_permutations():
+    domain = 37
+    stream = EpochStream(domain, seed=42)
+    epochs = [tuple(islice(stream, domain)) for _ in range(5)]
+    for epoch in epochs:
+        assert sorted(epoch) == list(range(domain))
+    assert len(set(epochs)) > 1
+
+
+def test_epoch_seed():
+    domain = 38
+    stream = EpochStream(domain, seed=43)
+    perms = Permutations(domain)
+    for epoch in range(3):
+        p = perms.get(stream.epoch_seed(epoch))
+        assert stream.epoch_permutation(epoch) == p
+        assert tuple(islice(stream, domain)) == tuple(p)
+
+
+def test_read_matches_iteration():
+    domain = 39
+    s1 = EpochStream(domain, seed=44)
+    s2 = EpochStream(domain, seed=44)
+    values = []
+    for n in (0, 1, 10, 38, 39, 40, 100):
+        values.extend(s1.read(n))
+    assert values == list(islice(s2, len(values)))
+    assert s1.tell() == s2.tell()
+
+
+def test_chunks():
+    domain = 40
+    s1 = EpochStream(domain, seed=45)
+    s2 = EpochStream(domain, seed=45)
+    chunks = list(islice(s1.chunks(17), 10))
+    assert all(len(c) == 17 for c in chunks)
+    assert [v for c in chunks for v in c] == list(islice(s2, 170))
+
+
+def test_seek():
+    domain = 41
+    stream = EpochStream(domain, seed=46)
+    values = list(islice(stream, 5 * domain))
+    stream.seek(3, 7)
+    assert stream.tell() == (3, 7)
+    assert stream.step == 3 * domain + 7
+    assert list(islice(stream, domain)) == values[3 * domain + 7:4 * domain + 7]
+    for step in (0, 1, domain, 2 * domain + 5):
+        stream.seek_step(step)
+        assert stream.step == step
+        assert next(stream) == values[step]
+
+
+def test_seek_invalid():
+    stream = EpochStream(10, seed=47)
+    with pytest.raises(ValueError, match='epoch must be >= 0'):
+        stream.seek(-1)
+    with pytest.raises(ValueError, match='position must be >= 0 and < epoch_length'):
+        stream.seek(0, 10)
+    with pytest.raises(ValueError, match='step must be >= 0'):
+        stream.seek_step(-1)
+
+
+def test_shards():
+    domain = 42
+    num_shards = 4
+    streams = [EpochStream(domain, 48, shard, num_shards) for shard in range(num_shards)]
+    for epoch in range(3):
+        values = []
+        for stream in streams:
+            values.extend(islice(stream, stream.epoch_length))
+        assert sorted(values) == list(range(domain))
+
+
+def test_shards_drop_last():
+    domain = 43
+    num_shards = 4
+    streams = [EpochStream(domain, 49, shard, num_shards, drop_last=True) for shard in range(num_shards)]
+    assert all(stream.epoch_length == domain // num_shards for stream in streams)
+    for stream in streams:
+        stream.seek_step(1000)
+        assert stream.tell() == divmod(1000, domain // num_shards)
+
+
+def test_invalid_shards():
+    with pytest.raises(ValueError, match='num_shards must be >= 1'):
+        EpochStream(10, num_shards=0)
+    with pytest.raises(ValueError, match='shard must be >= 0 and < num_shards'):
+        EpochStream(10, shard=2, num_shards=2)
+    with pytest.raises(ValueError, match='seed is required when num_shards > 1'):
+        EpochStream(10, shard=1, num_shards=2)
+    with pytest.raises(ValueError, match='epochs are empty'):
+        EpochStream(3, shard=3, num_shards=4)
@@ -0,0 +1,66 @@
+import array
+from math import gcd
+import random
+
+import pytest
+
+from shufflish import AffineCipher
+from shufflish._affine import _kernels
+
+
+def random_cipher(rand, max_domain):
+    domain = rand.randrange(1, max_domain)
+    prime = rand.randrange(1, domain) if domain > 1 else 1
+    while gcd(prime, domain) != 1:
+        prime = rand.randrange(1, domain)
+    pre_offset = rand.randrange(domain)
+    post_offset = rand.randrange(domain)
+    return AffineCipher(domain, prime, pre_offset, post_offset)
+
+
+def reference(p, offset, n):
+    domain, prime, pre_offset, post_offset = p.parameters()
+    extents = p.extents()
+    return [
+        ((extents.start + j * extents.step + pre_offset) * prime + post_offset) % domain
+        for j in range(offset, min(offset + n, len(p)))
+    ]
+
+
+def test_kernels_available():
+    kernels = _kernels()
+    assert "generic" in kernels
+
+
+@pytest.mark.parametrize("kernel", _kernels())
+@pytest.mark.parametrize("typecode,max_domain", (("Q", 2**63), ("I", 2**32 + 1), ("Q", 1000)))
+def test_kernel(kernel, typecode, max_domain):
+    rand = random.Random(f"{kernel}{typecode}{max_domain}")
+    for _ in range(200):
+        p = random_cipher(rand, max_domain)
+        domain = len(p)
+        start = rand.randrange(domain)
+        stop = rand.randrange(-1, domain)
+        step = rand.choice((1, 2, 7, -1, -3, domain + 1, -2**40))
+        pp = p[start:stop:step] if rand.random() < 0.8 else p
+        offset = rand.randrange(min(50, len(pp) + 1))
+        n = rand.choice((0, 1, 15, 16, 17, 100, 1000))
+        out = array.array(typecode, bytes(array.array(typecode).itemsize * n))
+        count = pp._fill_kernel(out, offset, kernel)
+        expected = reference(pp, offset, n)
+        assert count == len(expected)
+        assert list(out[:count]) == expected, (p, pp.extents(), offset, n)
+
+
+def test_kernel_matches_getitem():
+    p = AffineCipher(2**63 - 25, 2**62 + 1, 2**63 - 26, 2**40)
+    out = array.array("Q", bytes(8 * 1000))
+    for kernel in _kernels():
+        assert p[::-7]._fill_kernel(out, 3, kernel) == 1000
+        assert list(out) == [p[::-7][i] for i in range(3, 1003)]
+
+
+def test_unknown_kernel():
+    p = AffineCipher(10, 3, 0, 0)
+    with pytest.raises(ValueError, match='unknown kernel'):
+        p._fill_kernel(array.array("Q", bytes(80)), 0, "magic")
@@ -0,0 +1,199 @@
+import array
+import asyncio
+import random
+
+import pytest
+
+import shufflish
+from shufflish import LARGE_PRIMES
+from shufflish import AffineCipher, AsyncPrefetcher, EpochStream, LargeAffineCipher
+from shufflish import LocalShuffle, Permutations, permutation
+
+
+def _pair(domain, seed):
+    p = permutation(domain, seed)
+    return p, LargeAffineCipher(*p.parameters())
+
+
+def test_matches_affine_cipher():
+    for domain in (1, 2, 3, 10, 97, 1000):
+        for seed in (0, 1, 42, 2**40 + 17):
+            p, q = _pair(domain, seed)
+            assert list(q) == list(p)
+            assert len(q) == len(p)
+            assert q.parameters() == p.parameters()
+            assert [q[i] for i in range(-domain, domain)] == [p[i] for i in range(-domain, domain)]
+
+
+def test_slices_match_affine_cipher():
+    domain = 101
+    p, q = _pair(domain, 1234)
+    indices = (None, -150, -101, -50, -1, 0, 1, 50, 100, 101, 150)
+    for start in indices:
+        for stop in indices:
+            for step in (None, -7, -2, -1, 1, 3, 200):
+                a = p[start:stop:step]
+                b = q[start:stop:step]
+                assert list(b) == list(a), (start, stop, step)
+                assert b.extents() == a.extents(), (start, stop, step)
+                assert b.is_slice() == a.is_slice()
+                assert list(b[1::2]) == list(a[1::2])
+                for v in range(-1, domain + 1):
+                    assert (v in b) == (v in a)
+                    if v in a:
+                        assert b.index(v) == a.index(v)
+
+
+def test_out_of_range():
+    q = LargeAffineCipher(2**64 + 13, 2**64 + 1, 5, 7)
+    with pytest.raises(IndexError, match='index out of range'):
+        q[2**64 + 13]
+    with pytest.raises(IndexError, match='index out of range'):
+        q[-(2**64) - 14]
+    with pytest.raises(ValueError, match='is not in slice'):
+        q[:10].index(q[10])
+
+
+def test_invalid_index_type():
+    for p in (permutation(10, 1), LargeAffineCipher(10, 3, 1, 2), permutation(2**64 + 13, 1)):
+        with pytest.raises(TypeError):
+            p[1.5]
+        with pytest.raises(TypeError):
+            p["1"]
+
+
+def test_invert_expand():
+    domain = 2**100 + 277
+    p = permutation(domain, 42)
+    assert isinstance(p, LargeAffineCipher)
+    ip = p.invert()
+    for i in (0, 1, 12345, domain - 1):
+        assert ip[p[i]] == i
+        assert p.index(p[i]) == i
+    assert ip.invert() == p
+    with pytest.raises(RuntimeError, match='cannot invert a slice'):
+        p[5:].invert()
+    assert p[5:100:3].expand() == p
+
+
+def test_size():
+    domain = 2**64 + 13
+    p = permutation(domain, 7)
+    assert p.size() == domain
+    assert p[::2].size() == (domain + 1) // 2
+    assert len(p[10:20]) == 10
+    with pytest.raises(OverflowError):
+        len(p)
+
+
+def test_fill():
+    domain = 2**64 - 59
+    p = permutation(domain, 3)
+    assert isinstance(p, LargeAffineCipher)
+    out = array.array("Q", bytes(8 * 100))
+    assert p.fill(out, 2**63) == 100
+    assert list(out) == list(p[2**63:2**63 + 100])
+    out = [None] * 10
+    assert p[-5:].fill(out) == 5
+    assert out[:5] == list(p[-5:])
+    with pytest.raises(ValueError, match='offset must be >= 0'):
+        p.fill(out, -1)
+
+
+def test_permutations_class():
+    for domain in (2**63, 2**64 + 13, 2**127 + 45):
+        perms = Permutations(domain)
+        for seed in (0, 1, 2**64 + 3, 2**128 - 1):
+            p = perms.get(seed)
+            assert isinstance(p, LargeAffineCipher)
+            assert p == permutation(domain, seed)
+            values = list(p[:1000])
+            assert len(set(values)) == 1000
+            assert all(0 <= v < domain for v in values)
+            assert [p.index(v) for v in values] == list(range(1000))
+        with pytest.raises(ValueError, match=r'domain must be < 2\*\*63'):
+            perms.bank([1, 2, 3])
+
+
+def test_distinct_seeds():
+    domain = 2**80 + 23
+    perms = set(permutation(domain, seed) for seed in range(100))
+    assert len(perms) == 100
+
+
+def test_mixed_prime_sets():
+    # counts of combinations differ between PRIMES and LARGE_PRIMES,
+    # so caching them must not mix up the two sets
+    for domain in (10007, 65536):
+        for seed in (4000, 4700):
+            shufflish.NUM_COMBINATIONS.pop((domain, 2), None)
+            Permutations(domain, num_primes=2, primes=LARGE_PRIMES)
+            permutation(domain, 1, num_primes=2, primes=LARGE_PRIMES)
+            p = permutation(domain, seed, num_primes=2)
+            assert p == Permutations(domain, num_primes=2).get(seed)
+            shufflish.NUM_COMBINATIONS.pop((domain, 2), None)
+            assert permutation(domain, seed, num_primes=2) == p
+
+
+def test_small_domains_unchanged():
+    for domain in (10, 2**32 + 15, 2**63 - 1):
+        seed = random.Random(domain).randrange(2**64)
+        assert isinstance(permutation(domain, seed), AffineCipher)
+        assert isinstance(Permutations(domain).get(seed), AffineCipher)
+
+
+def test_epoch_stream():
+    domain = 2**64 + 13
+    stream = EpochStream(domain, seed=5, shard=1, num_shards=3)
+    assert stream.epoch_length == (domain + 1) // 3
+    p = stream.epoch_permutation(0)
+    assert isinstance(p, LargeAffineCipher)
+    assert [next(stream) for _ in range(5)] == list(p[:5])
+    stream.seek(2, stream.epoch_length - 2)
+    values = [next(stream) for _ in range(4)]
+    assert values[:2] == list(stream.epoch_permutation(2)[-2:])
+    assert values[2:] == list(stream.epoch_permutation(3)[:2])
+    with pytest.raises(ValueError, match=r'domain must be <= 2\*\*64'):
+        stream.read(3)
+
+
+def test_epoch_stream_read():
+    domain = 2**63 + 5
+    stream = EpochStream(domain, seed=5)
+    stream.seek(0, domain - 2)
+    values = stream.read(4)
+    assert list(values[:2]) == list(stream.epoch_permutation(0)[-2:])
+    assert list(values[2:]) == list(stream.epoch_permutation(1)[:2])
+
+
+def test_local_shuffle():
+    domain = 2**64 + 13
+    p = permutation(domain, 3)
+    ls = LocalShuffle(p, chunk_size=16, seed=1)
+    assert ls.size() == domain
+    with pytest.raises(OverflowError):
+        len(ls)
+    chunk = [ls[i] for i in range(2**64, 2**64 + 13)]
+    assert sorted(chunk) == sorted(p[2**64:])
+    assert list(ls[-13:]) == chunk
+    assert ls[::2].size() == (domain + 1) // 2
+
+
+def test_prefetcher():
+    domain = 2**63 + 5
+    p = permutation(domain, 3)
+
+    async def collect():
+        chunks = []
+        async with AsyncPrefetcher(p, chunk_size=4, start=domain - 10) as prefetcher:
+            async for chunk in prefetcher:
+                chunks.append(list(chunk))
+        return chunks
+
+    chunks = asyncio.run(collect())
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert sum(chunks, []) == list(p[-10:])
+    with pytest.raises(ValueError, match=r'domain must be <= 2\*\*64'):
+        AsyncPrefetcher(permutation(2**64 + 13, 3))
+    with pytest.raises(ValueError, match=r'domain must be <= 2\*\*64'):
+        AsyncPrefetcher(permutation(2**64 + 13, 3), shuffle_chunk_size=16)
@@ -0,0 +1,80 @@
+from itertools import chain
+
+import pytest
+
+from shufflish import LocalShuffle, permutation
+
+
+def test_is_permutation():
+    domain = 1000
+    p = permutation(domain)
+    ls = LocalShuffle(p, chunk_size=64)
+    assert len(ls) == domain
+    assert sorted(ls) == list(range(domain))
+    assert tuple(ls) != tuple(p)
+
+
+def test_chunks_stay_local():
+    domain = 1000
+    chunk_size = 64
+    p = permutation(domain)
+    ls = LocalShuffle(p, chunk_size=chunk_size)
+    t = tuple(ls)
+    for start in range(0, domain, chunk_size):
+        assert sorted(t[start:start + chunk_size]) == sorted(p[start:start + chunk_size])
+
+
+def test_deterministic():
+    p = permutation(1001, 42)
+    t1 = tuple(LocalShuffle(p, 100, seed=43))
+    t2 = tuple(LocalShuffle(p, 100, seed=43, cache_size=1))
+    t3 = tuple(LocalShuffle(p, 100, seed=44))
+    assert t1 == t2
+    assert t1 != t3
+
+
+def test_item():
+    domain = 1002
+    ls = LocalShuffle(permutation(domain), chunk_size=50, cache_size=2)
+    t = tuple(ls)
+    for i in chain(range(domain - 1, -1, -7), range(-domain, 0, 11)):
+        assert ls[i] == t[i], i
+
+
+def test_item_out_of_bounds():
+    ls = LocalShuffle(permutation(10), chunk_size=3)
+    with pytest.raises(IndexError, match='index out of range'):
+        ls[10]
+    with pytest.raises(IndexError, match='index out of range'):
+        ls[-11]
+
+
+def test_slice():
+    domain = 103
+    ls = LocalShuffle(permutation(domain), chunk_size=8)
+    t = tuple(ls)
+    for sl in (slice(3, 50), slice(None, None, -1), slice(1, None, 4), slice(90, 2, -7)):
+        assert tuple(ls[sl]) == t[sl], sl
+        assert len(ls[sl]) == len(t[sl]), sl
+        assert tuple(ls[sl][::-2]) == t[sl][::-2], sl
+
+
+def test_shards():
+    domain = 104
+    num_shards = 3
+    ls = LocalShuffle(permutation(domain), chunk_size=10)
+    values = chain.from_iterable(ls[shard::num_shards] for shard in range(num_shards))
+    assert sorted(values) == list(range(domain))
+
+
+def test_sequence():
+    ls = LocalShuffle(list(range(100)), chunk_size=10, seed=1)
+    assert sorted(ls) == list(range(100))
+    assert sorted(ls[:10]) == list(range(10))
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match='chunk_size must be >= 1'):
+        LocalShuffle(permutation(10), chunk_size=0)
+    with pytest.raises(ValueError, match='cache_size must be >= 1'):
+        LocalShuffle(permutation(10), cache_size=0)
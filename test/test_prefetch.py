@@ -0,0 +1,82 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from shufflish import AsyncPrefetcher, LocalShuffle, permutation
+
+
+async def collect(prefetcher):
+    values = []
+    async for chunk in prefetcher:
+        values.extend(chunk)
+    return values
+
+
+def test_prefetch():
+    p = permutation(10000)
+    values = asyncio.run(collect(AsyncPrefetcher(p, chunk_size=777, readahead=2)))
+    assert values == list(p)
+
+
+def test_prefetch_start():
+    p = permutation(1000)
+    values = asyncio.run(collect(AsyncPrefetcher(p[::-1], chunk_size=100, start=550)))
+    assert values == list(p[::-1])[550:]
+
+
+def test_prefetch_local_shuffle():
+    p = permutation(1000)
+    prefetcher = AsyncPrefetcher(p, chunk_size=64, shuffle_chunk_size=100, seed=42)
+    values = asyncio.run(collect(prefetcher))
+    assert values == list(LocalShuffle(p, 100, seed=42))
+
+
+def test_prefetch_sequence():
+    values = asyncio.run(collect(AsyncPrefetcher(list(range(100)), chunk_size=7)))
+    assert values == list(range(100))
+
+
+def test_prefetch_close_early():
+    async def consume():
+        async with AsyncPrefetcher(permutation(10**6), chunk_size=10, readahead=1) as prefetcher:
+            async for chunk in prefetcher:
+                break
+        assert not prefetcher._thread.is_alive()
+        with pytest.raises(StopAsyncIteration):
+            await prefetcher.__anext__()
+        return chunk
+    assert len(asyncio.run(consume())) == 10
+
+
+def test_prefetch_error():
+    class Broken:
+        def __len__(self):
+            return 10
+
+        def __getitem__(self, item):
+            raise KeyError("broken")
+
+    with pytest.raises(KeyError, match="broken"):
+        asyncio.run(collect(AsyncPrefetcher(Broken())))
+
+
+def test_invalid_arguments():
+    p = permutation(10)
+    with pytest.raises(ValueError, match='chunk_size must be >= 1'):
+        AsyncPrefetcher(p, chunk_size=0)
+    with pytest.raises(ValueError, match='readahead must be >= 1'):
+        AsyncPrefetcher(p, readahead=0)
+    with pytest.raises(ValueError, match='start must be >= 0'):
+        AsyncPrefetcher(p, start=-1)
+
+
+def test_asyncio_imported_lazily():
+    code = (
+        "import sys, shufflish; "
+        "assert 'asyncio' not in sys.modules; "
+        "shufflish.AsyncPrefetcher; "
+        "assert 'asyncio' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
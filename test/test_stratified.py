@@ -0,0 +1,109 @@
+import array
+from math import ceil, log2
+
+import pytest
+
+from shufflish import StratifiedPermutation, permutation
+from shufflish import _derive_seed
+
+
+def make_classes(sizes):
+    classes = []
+    offset = 0
+    for n in sizes:
+        classes.append(array.array("Q", range(offset, offset + n)))
+        offset += n
+    return classes
+
+
+SIZES = [900, 90, 9, 1, 300, 0, 50]
+
+
+def test_is_permutation():
+    classes = make_classes(SIZES)
+    for seed in range(10):
+        p = StratifiedPermutation(classes, seed)
+        assert len(p) == sum(SIZES)
+        assert sorted(p) == list(range(sum(SIZES)))
+
+
+def test_class_order():
+    classes = make_classes(SIZES)
+    seed = 42
+    p = StratifiedPermutation(classes, seed)
+    for k, rows in enumerate(classes):
+        values = [v for v in p if v in rows]
+        if rows:
+            pk = permutation(len(rows), _derive_seed(seed, k))
+            assert values == [rows[i] for i in pk]
+
+
+def test_windows_balanced():
+    classes = make_classes(SIZES)
+    total = sum(SIZES)
+    bound = ceil(log2(sum(1 for n in SIZES if n > 0)))
+    for seed in range(3):
+        p = StratifiedPermutation(classes, seed)
+        labels = [p.locate(i)[0] for i in range(len(p))]
+        for k, n in enumerate(SIZES):
+            prefix = [0]
+            for label in labels:
+                prefix.append(prefix[-1] + (label == k))
+            for w in (8, 64, 256):
+                for start in range(total - w + 1):
+                    count = prefix[start + w] - prefix[start]
+                    assert abs(count - w * n / total) < bound, (seed, k, w, start)
+
+
+def test_locate():
+    classes = make_classes(SIZES)
+    p = StratifiedPermutation(classes, 7)
+    for i, v in enumerate(p):
+        k, row = p.locate(i)
+        assert row == v
+        assert v in classes[k]
+    assert p.locate(-1) == p.locate(len(p) - 1)
+    with pytest.raises(IndexError, match='index out of range'):
+        p.locate(len(p))
+
+
+def test_slices():
+    classes = make_classes(SIZES)
+    p = StratifiedPermutation(classes, 1)
+    t = list(p)
+    n = len(t)
+    for start, stop, step in ((None, None, None), (3, 100, 7), (-50, None, 3), (None, None, -1), (500, 10, -13)):
+        pp = p[start:stop:step]
+        assert list(pp) == t[start:stop:step]
+        assert len(pp) == len(t[start:stop:step])
+        assert list(pp[1::2]) == t[start:stop:step][1::2]
+    assert p[5:].extents() == slice(5, n, 1)
+    assert [p[i] for i in range(-n, n)] == t + t
+    with pytest.raises(IndexError, match='index out of range'):
+        p[n]
+
+
+def test_shards():
+    classes = make_classes(SIZES)
+    p = StratifiedPermutation(classes, 3)
+    shards = [p[k::4] for k in range(4)]
+    assert sorted(v for shard in shards for v in shard) == sorted(p)
+
+
+def test_single_class():
+    classes = [[5, 3, 8, 1]]
+    p = StratifiedPermutation(classes, 11)
+    assert sorted(p) == [1, 3, 5, 8]
+
+
+def test_seeds_differ():
+    classes = make_classes(SIZES)
+    orders = set(tuple(StratifiedPermutation(classes, seed)) for seed in range(20))
+    assert len(orders) == 20
+
+
+def test_errors():
+    with pytest.raises(ValueError, match='classes must not be empty'):
+        StratifiedPermutation([])
+    with pytest.raises(ValueError, match='classes must not all be empty'):
+        StratifiedPermutation([[], array.array("Q")])
@@ -0,0 +1,101 @@
+import threading
+
+import shufflish
+from shufflish import Permutations, permutation
+
+
+def run_threads(target, num_threads=16):
+    barrier = threading.Barrier(num_threads)
+    results = [None] * num_threads
+    errors = []
+
+    def run(k):
+        barrier.wait()
+        try:
+            results[k] = target(k)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(k,)) for k in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+
+def test_shared_cipher_inverse():
+    domain = 10007
+    for seed in range(20):
+        p = permutation(domain, seed)
+        expected = [p.index(v) for v in range(domain)]
+        p = permutation(domain, seed)
+
+        def target(k):
+            ip = p.invert()
+            return (
+                [p.index(v) for v in range(domain)],
+                [ip[v] for v in range(domain)],
+                all(v in p for v in range(domain)),
+            )
+
+        for indices, inverted, contained in run_threads(target, 8):
+            assert indices == expected
+            assert inverted == expected
+            assert contained
+
+
+def test_inverse_is_copied():
+    p = permutation(1000, 42)
+    p.index(p[0])
+    assert p[10:].index(p[10]) == 0
+    assert p[10:].expand().invert() == p.invert()
+
+
+def test_permutations_single_flight(monkeypatch):
+    calls = []
+    original = shufflish._modular_prime_combinations
+
+    def counting(domain, primes, k):
+        calls.append(domain)
+        yield from original(domain, primes, k)
+
+    monkeypatch.setattr(shufflish, "_modular_prime_combinations", counting)
+    domain = 999_983 * 3
+    perms = run_threads(lambda k: Permutations(domain))
+    assert calls == [domain]
+    assert all(p.coprimes is perms[0].coprimes for p in perms)
+    assert not shufflish._COPRIME_BUILDERS
+    assert shufflish.NUM_COMBINATIONS[domain, 3] == len(perms[0].coprimes)
+
+
+def test_permutations_different_keys():
+    domains = [1009 * k for k in range(1, 9)]
+    perms = run_threads(lambda k: Permutations(domains[k % len(domains)]))
+    for k, p in enumerate(perms):
+        assert p.domain == domains[k % len(domains)]
+        assert p.coprimes is perms[k % len(domains)].coprimes
+    assert not shufflish._COPRIME_BUILDERS
+
+
+def test_builder_error(monkeypatch):
+    def failing(domain, primes, k):
+        raise RuntimeError("boom")
+        yield
+
+    monkeypatch.setattr(shufflish, "_modular_prime_combinations", failing)
+    domain = 999_983 * 5
+    errors = []
+
+    def target(k):
+        try:
+            Permutations(domain)
+        except RuntimeError as e:
+            errors.append(e)
+
+    run_threads(target, 4)
+    assert len(errors) == 4
+    assert not shufflish._COPRIME_BUILDERS
+    monkeypatch.undo()
+    assert len(Permutations(domain).coprimes) > 0